@@ -27,9 +27,79 @@ class Settings(BaseSettings):
     PLAGIARISM_THRESHOLD_HIGH: float = 0.8  # >= 80% = High Probability of Plagiarism
     PLAGIARISM_THRESHOLD_MODERATE: float = 0.4  # >= 40% = Moderate Similarity
 
+    # Minimum similarity for two cohort submissions to be flagged as collusion
+    COLLUSION_THRESHOLD: float = 0.6
+
     # Number of top matches to return
     TOP_MATCHES_COUNT: int = 3
 
+    # Fraction of the fitted corpus that may be appended/deleted incrementally
+    # before the corpus index is refitted (refreshes vocabulary and IDF)
+    INDEX_COMPACTION_RATIO: float = 0.2
+
+    # Directory of the memory-mapped corpus index snapshot ("" disables it)
+    INDEX_SNAPSHOT_DIR: str = "./index_snapshot"
+
+    # File persisting the fuzzy-correction vocabulary ("" disables it)
+    VOCABULARY_PATH: str = "./fuzzy_vocabulary.json"
+
+    # Seconds an ingestion or deletion waits before the vocabulary file is
+    # rewritten in the background, so bursts are saved once (0 saves at once)
+    VOCABULARY_SAVE_DELAY: float = 5.0
+
+    # OCR correction engine: "extract" (RapidFuzz scan of the whole
+    # vocabulary), or the opt-in engines "symspell" (delete-index lookups,
+    # only within two edits, so long words may correct differently), "ocr"
+    # (confusion-table lookups, then "extract") and "bktree" (BK-tree radius
+    # query; it visits nearly the whole tree, so it is slower than "extract"
+    # and not recommended)
+    FUZZY_ENGINE: str = "extract"
+
+    # OCR confusion table for the "ocr" engine: misread text -> {intended text:
+    # weight}; candidates with the highest product of weights win
+    OCR_CONFUSIONS: dict[str, dict[str, float]] = {
+        "0": {"o": 0.9},
+        "1": {"l": 0.9, "i": 0.8},
+        "5": {"s": 0.8},
+        "8": {"b": 0.6},
+        "rn": {"m": 0.9},
+        "m": {"rn": 0.6},
+        "cl": {"d": 0.8},
+        "vv": {"w": 0.8},
+        "li": {"h": 0.6},
+        "ii": {"u": 0.6},
+        "c": {"e": 0.5},
+        "e": {"c": 0.5},
+    }
+
+    # Threads used by the "extract" engine's batched RapidFuzz scoring (-1 = all cores)
+    FUZZY_WORKERS: int = -1
+
+    # Memo of token corrections shared by all requests (entries; 0 disables it)
+    CORRECTION_CACHE_SIZE: int = 50000
+
+    # Parallel scoring: the corpus is split into this many row shards once it
+    # holds at least SHARD_MIN_DOCUMENTS documents (1 disables sharding)
+    SIMILARITY_SHARDS: int = 1
+    SHARD_MIN_DOCUMENTS: int = 20000
+
+    # Approximate (SimHash) engine: rows re-scored exactly after the Hamming scan
+    SIMHASH_CANDIDATES: int = 200
+
+    # LSA engine: latent dimensions of the TruncatedSVD projection (0 disables
+    # fitting it; "lsa" requests then use TF-IDF)
+    LSA_COMPONENTS: int = 200
+
+    # Long-document mode: submissions above LONG_DOCUMENT_WORDS cleaned words
+    # are scored in overlapping windows of WINDOW_WORDS raw words
+    LONG_DOCUMENT_WORDS: int = 2000
+    WINDOW_WORDS: int = 200
+    WINDOW_OVERLAP: int = 50
+
+    # Result cache for resubmitted texts (entries, seconds; size 0 disables it)
+    RESULT_CACHE_SIZE: int = 1024
+    RESULT_CACHE_TTL: float = 600.0
+
     # CORS settings (for Android app access)
     CORS_ORIGINS: list[str] = ["*"]
 
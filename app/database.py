@@ -39,6 +39,6 @@ def init_db():
     Initialize the database by creating all tables.
     Call this on application startup.
     """
-    from app.models import Document  # noqa: F401 - Import to register models
+    from app.models import CleanedText, CorpusVersion, Document, DocumentSignature  # noqa: F401 - Import to register models
 
     Base.metadata.create_all(bind=engine)
@@ -12,9 +12,11 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.database import init_db, get_db, SessionLocal
-from app.routes import analyze_router
+from app.routes import admin_router, analyze_router, cohort_router, documents_router
 from app.schemas.analysis import HealthResponse
 from app.seed import seed_database
+from app.services.fuzzy import save_vocabulary
+from app.services.ingest import build_indexes
 
 # Configure logging to show all debug messages
 logging.basicConfig(
@@ -38,23 +40,26 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """
     Application lifespan handler.
-    Initializes database and seeds data on startup.
+    Initializes database, seeds data and builds the similarity indexes on startup.
     """
     # Startup: Initialize database and seed
     print("Initializing database...")
     init_db()
 
-    # Seed with sample documents
+    # Seed with sample documents and build the similarity indexes once
     db = SessionLocal()
     try:
         seed_database(db)
+        print("Building similarity indexes...")
+        build_indexes(db)
     finally:
         db.close()
 
     print("Application startup complete.")
     yield
 
-    # Shutdown: Cleanup if needed
+    # Shutdown: write a vocabulary save that is still pending
+    save_vocabulary()
     print("Application shutdown.")
 
 
@@ -95,6 +100,9 @@ app.add_middleware(
 
 # Include API routes
 app.include_router(analyze_router)
+app.include_router(documents_router)
+app.include_router(cohort_router)
+app.include_router(admin_router)
 
 
 @app.get("/", tags=["Root"])
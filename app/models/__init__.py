@@ -1,3 +1,6 @@
+from .cleaned_text import CleanedText
+from .corpus_version import CorpusVersion
 from .document import Document
+from .signature import DocumentSignature
 
-__all__ = ["Document"]
+__all__ = ["CleanedText", "CorpusVersion", "Document", "DocumentSignature"]
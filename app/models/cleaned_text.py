@@ -0,0 +1,28 @@
+"""
+CleanedText ORM model caching preprocessed document content.
+Keyed by content hash so unchanged documents are never re-cleaned.
+"""
+
+from sqlalchemy import Column, Integer, String, Text
+
+from app.database import Base
+
+
+class CleanedText(Base):
+    """
+    Output of the NLP cleaning pipeline for a piece of document content.
+
+    Attributes:
+        content_hash: SHA-256 hex digest of the raw content
+        pipeline_version: nlp.CLEANING_PIPELINE_VERSION the text was cleaned with
+        cleaned: The cleaned text
+    """
+
+    __tablename__ = "cleaned_texts"
+
+    content_hash = Column(String(64), primary_key=True)
+    pipeline_version = Column(Integer, primary_key=True)
+    cleaned = Column(Text, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<CleanedText(content_hash='{self.content_hash[:12]}', version={self.pipeline_version})>"
@@ -0,0 +1,27 @@
+"""
+CorpusVersion ORM model counting changes to the documents table.
+Lets every worker tell cheaply whether its in-memory indexes are stale.
+"""
+
+from sqlalchemy import Column, Integer
+
+from app.database import Base
+
+
+class CorpusVersion(Base):
+    """
+    Single-row counter bumped in the same transaction as every document
+    insert or delete.
+
+    Attributes:
+        id: Always 1
+        version: Number of committed document changes
+    """
+
+    __tablename__ = "corpus_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<CorpusVersion(version={self.version})>"
@@ -6,6 +6,7 @@ These are the documents that user submissions will be compared against.
 from datetime import datetime
 
 from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.orm import relationship
 
 from app.database import Base
 
@@ -21,6 +22,7 @@ class Document(Base):
         category: Subject category (e.g., "Biology", "Computer Science")
         source: Origin of the document (e.g., "Wikipedia", "Thesis Abstract")
         created_at: Timestamp when the document was added
+        signature: Precomputed similarity fingerprints (see DocumentSignature)
     """
 
     __tablename__ = "documents"
@@ -32,5 +34,11 @@ class Document(Base):
     source = Column(String(100), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    signature = relationship(
+        "DocumentSignature",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
+
     def __repr__(self) -> str:
         return f"<Document(id={self.id}, title='{self.title}', category='{self.category}')>"
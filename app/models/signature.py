@@ -0,0 +1,30 @@
+"""
+DocumentSignature ORM model for precomputed per-document fingerprints.
+Kept in a side table so existing databases only gain a new table.
+"""
+
+from sqlalchemy import Column, ForeignKey, Integer, LargeBinary
+
+from app.database import Base
+
+
+class DocumentSignature(Base):
+    """
+    Precomputed similarity fingerprints for a reference document.
+
+    Attributes:
+        document_id: ID of the document the signature belongs to
+        minhash: MinHash signature over word shingles (uint32 array bytes)
+    """
+
+    __tablename__ = "document_signatures"
+
+    document_id = Column(
+        Integer,
+        ForeignKey("documents.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    minhash = Column(LargeBinary, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<DocumentSignature(document_id={self.document_id})>"
@@ -1,3 +1,6 @@
+from .admin import router as admin_router
 from .analyze import router as analyze_router
+from .cohort import router as cohort_router
+from .documents import router as documents_router
 
-__all__ = ["analyze_router"]
+__all__ = ["admin_router", "analyze_router", "cohort_router", "documents_router"]
@@ -0,0 +1,51 @@
+"""
+Administrative API routes.
+"""
+
+import logging
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.schemas.admin import IndexMemoryResponse
+from app.services.index import get_corpus_index
+from app.services.ingest import refresh_indexes
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+
+@router.get(
+    "/index/memory",
+    response_model=IndexMemoryResponse,
+    summary="Report corpus index memory usage",
+    description="Returns the size in bytes of each component of the in-memory similarity index.",
+)
+def index_memory(db: Session = Depends(get_db)) -> IndexMemoryResponse:
+    """
+    Report how much memory the corpus index holds.
+
+    Args:
+        db: Database session (injected, used if the index still needs building)
+
+    Returns:
+        IndexMemoryResponse with per-component and total sizes
+    """
+    refresh_indexes(db)
+    index = get_corpus_index(db)
+    state = index.state
+    components = index.memory_usage()
+
+    logger.info(f"[ADMIN] Corpus index holds {sum(components.values())} bytes")
+
+    return IndexMemoryResponse(
+        rows=len(state.documents),
+        live_documents=len(index),
+        vocabulary_size=state.matrix.shape[1] if state.matrix is not None else 0,
+        dtype=str(state.matrix.dtype) if state.matrix is not None else None,
+        components=components,
+        total_bytes=sum(components.values()),
+    )
@@ -6,13 +6,29 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database import get_db
-from app.schemas.analysis import AnalysisRequest, AnalysisResponse, MatchResult
+from app.schemas.analysis import (
+    AnalysisRequest,
+    AnalysisResponse,
+    MatchedSpan,
+    MatchResult,
+    PassageMatchResult,
+)
+from app.services.ingest import refresh_indexes
 from app.services.nlp import clean_text, get_word_count
+from app.services.similarity import MatchResult as SimilarityMatch
 from app.services.similarity import (
+    find_passage_matches,
     find_top_matches,
+    find_top_matches_batch,
+    find_top_matches_windowed,
+    find_verdict,
     get_decision,
     get_decision_color,
+    locate_matched_spans,
+    prepare_input,
+    prepare_inputs,
 )
 
 # Configure logging
@@ -20,6 +36,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["Analysis"])
 
+# Maximum number of submissions accepted by /api/analyze/batch
+MAX_BATCH_SIZE = 500
+
 
 @router.post(
     "/analyze",
@@ -27,7 +46,7 @@ router = APIRouter(prefix="/api", tags=["Analysis"])
     summary="Analyze text for plagiarism",
     description="Compares input text against the document repository and returns similarity scores.",
 )
-async def analyze_text(
+def analyze_text(
     request: AnalysisRequest,
     db: Session = Depends(get_db),
 ) -> AnalysisResponse:
@@ -40,8 +59,13 @@ async def analyze_text(
     3. Returns the top 3 most similar documents with their scores
     4. Provides a decision based on configurable thresholds
 
+    Submissions longer than LONG_DOCUMENT_WORDS are scored in overlapping
+    windows with TF-IDF; each match then reports its best window score and
+    coverage. Other engines are rejected for them (422), and verdict_only
+    returns just the best match.
+
     Args:
-        request: AnalysisRequest containing student_id and text
+        request: AnalysisRequest containing student_id, text and engine
         db: Database session (injected)
 
     Returns:
@@ -56,25 +80,191 @@ async def analyze_text(
     logger.info(f"[ANALYZE] Raw text preview (last 100 chars): {request.text[-100:]!r}")
 
     # Validate that text has meaningful content after cleaning
-    cleaned_text = clean_text(request.text)
-    word_count = len(cleaned_text.split()) if cleaned_text else 0
-
-    # === LOGGING: After Cleaning ===
-    logger.info(f"[ANALYZE] Cleaned text length: {len(cleaned_text)} chars")
-    logger.info(f"[ANALYZE] Word count after cleaning: {word_count}")
-    logger.info(f"[ANALYZE] Cleaned text preview: {cleaned_text[:200]!r}")
-
+    cleaned_text, word_count = _clean_and_count(request.text)
     if word_count < 5:
         raise HTTPException(
             status_code=400,
             detail="Text too short for analysis. Please provide at least 5 meaningful words.",
         )
 
+    refresh_indexes(db)
+
+    if word_count > settings.LONG_DOCUMENT_WORDS:
+        _check_long_document_engine([request])
+        matches = _find_long_document_matches(request, db)
+        return _build_response(request, word_count, cleaned_text, matches, db)
+
+    prepared_input = prepare_input(request.text, db)
+
+    if request.verdict_only:
+        logger.info("[ANALYZE] Calling find_verdict...")
+        _, match = find_verdict(request.text, db, prepared_input, request.categories)
+        matches = [match] if match is not None else []
+        return _build_response(request, word_count, prepared_input, matches, db)
+
     # Find top matching documents
     logger.info("[ANALYZE] Calling find_top_matches...")
-    matches = find_top_matches(request.text, db)
+    matches = find_top_matches(
+        request.text,
+        db,
+        engine=request.engine,
+        prepared_input=prepared_input,
+        categories=request.categories,
+    )
     logger.info(f"[ANALYZE] Found {len(matches)} matches")
 
+    return _build_response(request, word_count, prepared_input, matches, db)
+
+
+@router.post(
+    "/analyze/batch",
+    response_model=list[AnalysisResponse],
+    summary="Analyze many texts for plagiarism",
+    description="Analyzes a whole class set at once, scoring all submissions with one sparse matrix product.",
+)
+def analyze_batch(
+    requests: list[AnalysisRequest],
+    db: Session = Depends(get_db),
+) -> list[AnalysisResponse]:
+    """
+    Analyze a batch of submitted texts for plagiarism.
+
+    Inputs are corrected and cleaned one by one; all unscoped "tfidf" items
+    are then vectorized into one query matrix and scored against the corpus
+    in a single sparse product. Items using another engine or restricted to
+    categories are scored one by one, and items over LONG_DOCUMENT_WORDS
+    are scored in windows exactly as /api/analyze does. verdict_only items
+    return just the confirming match, as from /api/analyze.
+
+    Args:
+        requests: List of AnalysisRequest items
+        db: Database session (injected)
+
+    Returns:
+        One AnalysisResponse per request, in order
+    """
+    logger.info("=" * 60)
+    logger.info(f"[ANALYZE] New batch request with {len(requests)} items")
+
+    if not requests or len(requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch must contain between 1 and {MAX_BATCH_SIZE} items.",
+        )
+
+    cleaned = [_clean_and_count(r.text) for r in requests]
+    word_counts = [count for _, count in cleaned]
+    too_short = [i for i, count in enumerate(word_counts) if count < 5]
+    if too_short:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Items {too_short} are too short for analysis. "
+                "Please provide at least 5 meaningful words per item."
+            ),
+        )
+
+    long_items = [
+        i for i, count in enumerate(word_counts) if count > settings.LONG_DOCUMENT_WORDS
+    ]
+    _check_long_document_engine([requests[i] for i in long_items], long_items)
+
+    refresh_indexes(db)
+
+    # Long reports are windowed; their cleaned text is only used for passages
+    matches = {i: _find_long_document_matches(requests[i], db) for i in long_items}
+    short_items = [i for i in range(len(requests)) if i not in matches]
+    prepared_inputs = dict(zip(
+        short_items, prepare_inputs([requests[i].text for i in short_items], db)
+    ))
+    for i in long_items:
+        prepared_inputs[i] = cleaned[i][0]
+
+    for i in short_items:
+        if requests[i].verdict_only:
+            _, match = find_verdict(
+                requests[i].text, db, prepared_inputs[i], requests[i].categories
+            )
+            matches[i] = [match] if match is not None else []
+
+    tfidf_items = [
+        i
+        for i in short_items
+        if i not in matches and requests[i].engine == "tfidf" and not requests[i].categories
+    ]
+    batch_matches = find_top_matches_batch([prepared_inputs[i] for i in tfidf_items], db)
+    matches.update(zip(tfidf_items, batch_matches))
+
+    for i, r in enumerate(requests):
+        if i not in matches:
+            matches[i] = find_top_matches(
+                r.text,
+                db,
+                engine=r.engine,
+                prepared_input=prepared_inputs[i],
+                categories=r.categories,
+            )
+
+    return [
+        _build_response(r, word_counts[i], prepared_inputs[i], matches[i], db)
+        for i, r in enumerate(requests)
+    ]
+
+
+def _check_long_document_engine(
+    requests: list[AnalysisRequest],
+    positions: list[int] | None = None,
+) -> None:
+    """Reject long submissions asking for an engine other than tfidf (422)."""
+    rejected = [
+        position
+        for position, request in zip(positions or range(len(requests)), requests)
+        if request.engine != "tfidf"
+    ]
+    if not rejected:
+        return
+    detail = (
+        f"Texts over {settings.LONG_DOCUMENT_WORDS} words are scored in windows "
+        "with the tfidf engine only."
+    )
+    if positions is not None:
+        detail = f"Items {rejected}: {detail}"
+    raise HTTPException(status_code=422, detail=detail)
+
+
+def _find_long_document_matches(
+    request: AnalysisRequest,
+    db: Session,
+) -> list[SimilarityMatch]:
+    """Score a long report in page-sized windows instead of one diluted vector."""
+    logger.info("[ANALYZE] Calling find_top_matches_windowed...")
+    matches = find_top_matches_windowed(request.text, db, categories=request.categories)
+    if request.verdict_only:
+        matches = matches[:1]
+    return matches
+
+
+def _clean_and_count(text: str) -> tuple[str, int]:
+    """Clean raw text and count its meaningful words."""
+    cleaned_text = clean_text(text)
+    word_count = len(cleaned_text.split()) if cleaned_text else 0
+
+    # === LOGGING: After Cleaning ===
+    logger.info(f"[ANALYZE] Cleaned text length: {len(cleaned_text)} chars")
+    logger.info(f"[ANALYZE] Word count after cleaning: {word_count}")
+    logger.info(f"[ANALYZE] Cleaned text preview: {cleaned_text[:200]!r}")
+
+    return cleaned_text, word_count
+
+
+def _build_response(
+    request: AnalysisRequest,
+    word_count: int,
+    prepared_input: str,
+    matches: list[SimilarityMatch],
+    db: Session,
+) -> AnalysisResponse:
+    """Turn internal match results into the API response for one request."""
     # Determine highest score and decision
     highest_score = matches[0].similarity_score if matches else 0.0
     decision = get_decision(highest_score)
@@ -86,6 +276,11 @@ async def analyze_text(
     for i, m in enumerate(matches):
         logger.info(f"[ANALYZE] Match {i+1}: {m.title} (score: {m.similarity_score:.4f})")
 
+    # Align copied passages for the top matches only
+    spans = {}
+    if request.include_spans:
+        spans = locate_matched_spans(request.text, [m.document_id for m in matches], db)
+
     # Convert internal MatchResult to Pydantic schema
     match_results = [
         MatchResult(
@@ -94,10 +289,29 @@ async def analyze_text(
             category=m.category,
             source=m.source,
             score=round(m.similarity_score, 4),
+            coverage=round(m.coverage, 4) if m.coverage is not None else None,
+            spans=(
+                [MatchedSpan(**vars(span)) for span in spans.get(m.document_id, [])]
+                if request.include_spans
+                else None
+            ),
         )
         for m in matches
     ]
 
+    passage_results = None
+    if request.include_passages:
+        passage_results = []
+        for p in find_passage_matches(prepared_input, db):
+            passage_results.append(
+                PassageMatchResult(
+                    document_id=p.document_id,
+                    title=p.title,
+                    shared_fingerprints=p.shared_fingerprints,
+                    coverage=round(p.coverage, 4),
+                )
+            )
+
     return AnalysisResponse(
         student_id=request.student_id,
         decision=decision,
@@ -105,4 +319,5 @@ async def analyze_text(
         highest_score=round(highest_score, 4),
         word_count=word_count,
         top_matches=match_results,
+        passage_matches=passage_results,
     )
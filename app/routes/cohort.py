@@ -0,0 +1,81 @@
+"""
+API routes for cohort-wide collusion detection.
+"""
+
+import logging
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import get_db
+from app.schemas.cohort import (
+    CollusionClusterResult,
+    CollusionPairResult,
+    CollusionRequest,
+    CollusionResponse,
+)
+from app.services.cohort import find_collusion_clusters
+from app.services.ingest import refresh_indexes
+from app.services.similarity import prepare_inputs
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/cohort", tags=["Cohort"])
+
+
+@router.post(
+    "/collusion",
+    response_model=CollusionResponse,
+    summary="Detect collusion within a cohort",
+    description="Compares every submission for an assignment against every other and clusters similar ones.",
+)
+def detect_collusion(
+    request: CollusionRequest,
+    db: Session = Depends(get_db),
+) -> CollusionResponse:
+    """
+    Find groups of students whose submissions are similar to each other.
+
+    Args:
+        request: CollusionRequest with the assignment's submissions
+        db: Database session (injected)
+
+    Returns:
+        CollusionResponse with clusters of mutually similar submissions
+    """
+    threshold = request.threshold
+    if threshold is None:
+        threshold = settings.COLLUSION_THRESHOLD
+
+    logger.info("=" * 60)
+    logger.info(
+        f"[COHORT] Assignment {request.assignment_id}: "
+        f"{len(request.submissions)} submissions, threshold {threshold}"
+    )
+
+    refresh_indexes(db)
+    prepared_inputs = prepare_inputs([s.text for s in request.submissions], db)
+    clusters = find_collusion_clusters(prepared_inputs, threshold)
+
+    student_ids = [s.student_id for s in request.submissions]
+    return CollusionResponse(
+        assignment_id=request.assignment_id,
+        submission_count=len(request.submissions),
+        threshold=threshold,
+        clusters=[
+            CollusionClusterResult(
+                student_ids=[student_ids[i] for i in cluster.members],
+                pairs=[
+                    CollusionPairResult(
+                        student_a=student_ids[p.first],
+                        student_b=student_ids[p.second],
+                        score=round(min(p.similarity_score, 1.0), 4),
+                    )
+                    for p in cluster.pairs
+                ],
+            )
+            for cluster in clusters
+        ],
+    )
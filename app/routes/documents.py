@@ -0,0 +1,99 @@
+"""
+API routes for managing the reference document repository.
+"""
+
+import logging
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import Document
+from app.schemas.document import DocumentCreate, DocumentResponse
+from app.services.ingest import (
+    compact_indexes,
+    index_document,
+    prepare_document,
+    prepare_removal,
+    unindex_document,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/documents", tags=["Documents"])
+
+
+@router.post(
+    "",
+    response_model=DocumentResponse,
+    status_code=201,
+    summary="Add a reference document",
+    description="Stores a document and appends it to the similarity index without a full refit.",
+)
+def create_document(
+    request: DocumentCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+) -> Document:
+    """
+    Add a document to the reference repository.
+
+    Args:
+        request: DocumentCreate with title, content, category and source
+        background_tasks: Used to schedule index compaction
+        db: Database session (injected)
+
+    Returns:
+        The stored document
+    """
+    document = Document(
+        title=request.title,
+        content=request.content.strip(),
+        category=request.category,
+        source=request.source,
+    )
+    cleaned_text = prepare_document(document, db)
+    db.add(document)
+    db.commit()
+    db.refresh(document)
+
+    logger.info(f"[DOCUMENTS] Added document {document.id}: {document.title}")
+    index_document(document, cleaned_text)
+    background_tasks.add_task(compact_indexes)
+
+    return document
+
+
+@router.delete(
+    "/{document_id}",
+    status_code=204,
+    summary="Remove a reference document",
+    description="Deletes a document and tombstones it in the similarity index.",
+)
+def delete_document(
+    document_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+) -> Response:
+    """
+    Remove a document from the reference repository.
+
+    Args:
+        document_id: Database ID of the document
+        background_tasks: Used to schedule index compaction
+        db: Database session (injected)
+    """
+    document = db.get(Document, document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found.")
+
+    words = prepare_removal(document, db)
+    db.delete(document)
+    db.commit()
+
+    logger.info(f"[DOCUMENTS] Deleted document {document_id}")
+    unindex_document(document_id, words)
+    background_tasks.add_task(compact_indexes)
+
+    return Response(status_code=204)
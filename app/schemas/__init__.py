@@ -1,3 +1,23 @@
-from .analysis import AnalysisRequest, AnalysisResponse, MatchResult
+from .admin import IndexMemoryResponse
+from .analysis import (
+    AnalysisRequest,
+    AnalysisResponse,
+    MatchedSpan,
+    MatchResult,
+    PassageMatchResult,
+)
+from .cohort import CollusionRequest, CollusionResponse
+from .document import DocumentCreate, DocumentResponse
 
-__all__ = ["AnalysisRequest", "AnalysisResponse", "MatchResult"]
+__all__ = [
+    "IndexMemoryResponse",
+    "AnalysisRequest",
+    "AnalysisResponse",
+    "MatchedSpan",
+    "MatchResult",
+    "PassageMatchResult",
+    "CollusionRequest",
+    "CollusionResponse",
+    "DocumentCreate",
+    "DocumentResponse",
+]
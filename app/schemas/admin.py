@@ -0,0 +1,26 @@
+"""
+Pydantic schemas for administrative endpoints.
+"""
+
+from pydantic import BaseModel, Field
+
+
+class IndexMemoryResponse(BaseModel):
+    """
+    Response schema for the /api/admin/index/memory endpoint.
+
+    Attributes:
+        rows: Rows in the document matrix, including tombstoned ones
+        live_documents: Rows still returned by queries
+        vocabulary_size: Number of TF-IDF features
+        dtype: Element type of the document matrix
+        components: Bytes held by each index component
+        total_bytes: Sum of all components
+    """
+
+    rows: int = Field(..., ge=0)
+    live_documents: int = Field(..., ge=0)
+    vocabulary_size: int = Field(..., ge=0)
+    dtype: str | None = None
+    components: dict[str, int]
+    total_bytes: int = Field(..., ge=0)
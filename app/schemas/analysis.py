@@ -3,6 +3,8 @@ Pydantic schemas for the plagiarism analysis API.
 Defines request and response models.
 """
 
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -13,6 +15,14 @@ class AnalysisRequest(BaseModel):
     Attributes:
         student_id: Unique identifier for the student (for logging/tracking)
         text: The raw text extracted from the document image via OCR
+        engine: Retrieval engine ("tfidf" cosine, "minhash" near-duplicate,
+            "simhash" approximate cosine, or "lsa" latent-topic cosine)
+        include_passages: Also report documents sharing copied passages
+        include_spans: Also return character offsets of copied passages
+            for each top match
+        categories: Only compare against documents of these categories
+        verdict_only: Stop at the first document confirming the verdict
+            instead of ranking the top matches
     """
 
     student_id: str = Field(
@@ -28,6 +38,54 @@ class AnalysisRequest(BaseModel):
         description="The raw text content extracted from the image via OCR",
         examples=["The mitochondria is the powerhouse of the cell..."],
     )
+    engine: Literal["tfidf", "minhash", "simhash", "lsa"] = Field(
+        default="tfidf",
+        description=(
+            "Retrieval engine: TF-IDF cosine, MinHash LSH for near-verbatim copies, "
+            "SimHash approximate search for very large repositories, "
+            "or LSA dense vectors for paraphrase-tolerant matching"
+        ),
+    )
+    include_passages: bool = Field(
+        default=False,
+        description="Also report reference documents sharing copied passages (winnowing)",
+    )
+    include_spans: bool = Field(
+        default=False,
+        description="Return character offsets of copied passages for each top match",
+    )
+    categories: list[str] | None = Field(
+        default=None,
+        min_length=1,
+        description="Restrict the comparison to documents of these categories",
+        examples=[["Biology"]],
+    )
+    verdict_only: bool = Field(
+        default=False,
+        description=(
+            "Only decide the verdict: top_matches holds the first confirming "
+            "document and highest_score its score, not necessarily the maximum"
+        ),
+    )
+
+
+class MatchedSpan(BaseModel):
+    """
+    Schema for a copied passage located in both texts.
+
+    Offsets are character positions, end exclusive.
+
+    Attributes:
+        submission_start: Start offset in the submitted text
+        submission_end: End offset in the submitted text
+        reference_start: Start offset in the reference document content
+        reference_end: End offset in the reference document content
+    """
+
+    submission_start: int = Field(..., ge=0)
+    submission_end: int = Field(..., ge=0)
+    reference_start: int = Field(..., ge=0)
+    reference_end: int = Field(..., ge=0)
 
 
 class MatchResult(BaseModel):
@@ -39,7 +97,11 @@ class MatchResult(BaseModel):
         title: Title of the matched document
         category: Subject category of the document
         source: Origin of the document (e.g., Wikipedia, Thesis)
-        score: Cosine similarity score (0.0 to 1.0)
+        score: Similarity score (0.0 to 1.0); TF-IDF cosine for every engine
+            except "lsa", which scores cosine in the latent space
+        coverage: Fraction of windows matching the document (long
+            submissions scored window by window only)
+        spans: Copied passages (only when include_spans is set)
     """
 
     document_id: int
@@ -47,6 +109,25 @@ class MatchResult(BaseModel):
     category: str
     source: str | None = None
     score: float = Field(..., ge=0.0, le=1.0)
+    coverage: float | None = Field(default=None, ge=0.0, le=1.0)
+    spans: list[MatchedSpan] | None = None
+
+
+class PassageMatchResult(BaseModel):
+    """
+    Schema for a reference document sharing copied passages with the input.
+
+    Attributes:
+        document_id: Database ID of the matched document
+        title: Title of the matched document
+        shared_fingerprints: Number of winnowing fingerprints in common
+        coverage: Fraction of the input's fingerprints found in the document
+    """
+
+    document_id: int
+    title: str
+    shared_fingerprints: int = Field(..., ge=0)
+    coverage: float = Field(..., ge=0.0, le=1.0)
 
 
 class AnalysisResponse(BaseModel):
@@ -60,6 +141,7 @@ class AnalysisResponse(BaseModel):
         highest_score: The highest similarity score found
         word_count: Number of words in the cleaned input
         top_matches: List of top N most similar documents
+        passage_matches: Documents sharing copied passages (if requested)
     """
 
     student_id: str
@@ -79,6 +161,10 @@ class AnalysisResponse(BaseModel):
         default_factory=list,
         description="Top N most similar documents",
     )
+    passage_matches: list[PassageMatchResult] | None = Field(
+        default=None,
+        description="Documents sharing copied passages, when include_passages is set",
+    )
 
 
 class HealthResponse(BaseModel):
@@ -0,0 +1,64 @@
+"""
+Pydantic schemas for cohort-wide collusion detection.
+"""
+
+from pydantic import BaseModel, Field
+
+
+class CohortSubmission(BaseModel):
+    """
+    A single student's submission within a cohort.
+
+    Attributes:
+        student_id: Unique identifier for the student
+        text: The raw text extracted from the document image via OCR
+    """
+
+    student_id: str = Field(..., min_length=1, max_length=50)
+    text: str = Field(..., min_length=10)
+
+
+class CollusionRequest(BaseModel):
+    """
+    Request schema for the /api/cohort/collusion endpoint.
+
+    Attributes:
+        assignment_id: Identifier of the assignment the submissions belong to
+        submissions: Every submission for the assignment
+        threshold: Minimum similarity for two submissions to be linked
+            (default from settings)
+    """
+
+    assignment_id: str = Field(..., min_length=1, max_length=100)
+    submissions: list[CohortSubmission] = Field(..., min_length=2)
+    threshold: float | None = Field(default=None, ge=0.0, le=1.0)
+
+
+class CollusionPairResult(BaseModel):
+    """Schema for two submissions whose similarity crosses the threshold."""
+
+    student_a: str
+    student_b: str
+    score: float = Field(..., ge=0.0, le=1.0)
+
+
+class CollusionClusterResult(BaseModel):
+    """
+    Schema for a group of mutually similar submissions.
+
+    Attributes:
+        student_ids: Students in the cluster
+        pairs: Linked pairs within the cluster, highest score first
+    """
+
+    student_ids: list[str]
+    pairs: list[CollusionPairResult]
+
+
+class CollusionResponse(BaseModel):
+    """Response schema for the /api/cohort/collusion endpoint."""
+
+    assignment_id: str
+    submission_count: int
+    threshold: float
+    clusters: list[CollusionClusterResult] = Field(default_factory=list)
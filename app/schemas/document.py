@@ -0,0 +1,36 @@
+"""
+Pydantic schemas for managing reference documents.
+"""
+
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class DocumentCreate(BaseModel):
+    """
+    Request schema for adding a reference document.
+
+    Attributes:
+        title: Document title
+        content: The full text content of the document
+        category: Subject category (e.g., "Biology")
+        source: Origin of the document (e.g., "Thesis Abstract")
+    """
+
+    title: str = Field(..., min_length=1, max_length=255)
+    content: str = Field(..., min_length=10)
+    category: str = Field(..., min_length=1, max_length=100)
+    source: str | None = Field(default=None, max_length=100)
+
+
+class DocumentResponse(BaseModel):
+    """Response schema for a stored reference document."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    category: str
+    source: str | None = None
+    created_at: datetime | None = None
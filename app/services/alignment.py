@@ -0,0 +1,160 @@
+"""
+Passage alignment between a submission and a reference document.
+Locates copied spans with greedy string tiling over word tokens.
+"""
+
+import heapq
+import logging
+import re
+from dataclasses import dataclass
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Minimum number of consecutive matching words reported as a copied span
+MIN_SPAN_TOKENS = 8
+
+# Most token comparisons spent collecting runs per document pair
+MAX_ALIGNMENT_WORK = 1_000_000
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+@dataclass
+class MatchedSpan:
+    """A copied passage, as character offsets into both texts (end exclusive)."""
+
+    submission_start: int
+    submission_end: int
+    reference_start: int
+    reference_end: int
+
+
+def tokenize_with_offsets(text: str) -> tuple[list[str], list[tuple[int, int]]]:
+    """
+    Split text into lowercase word tokens, keeping their character offsets.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Tuple of (tokens, offsets), where offsets[i] is (start, end) of tokens[i]
+    """
+    tokens = []
+    offsets = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        tokens.append(match.group().lower())
+        offsets.append(match.span())
+    return tokens, offsets
+
+
+def greedy_string_tiling(
+    a: list[str],
+    b: list[str],
+    min_length: int = MIN_SPAN_TOKENS,
+    max_work: int = MAX_ALIGNMENT_WORK,
+) -> list[tuple[int, int, int]]:
+    """
+    Find non-overlapping maximal common token runs (Wise's greedy string tiling).
+
+    The min_length-grams of b are indexed once, and a single sweep over a
+    collects every maximal common run: a seed hit whose preceding tokens
+    also match lies inside a run found from an earlier start, so it is not
+    extended again. Runs are then tiled longest first. A run overlapping an
+    earlier tile is cut into its untiled pieces, which go back into the
+    queue if still min_length long; marking tokens only shortens runs, so
+    this tiles the same runs as rescanning both texts after every pass.
+
+    Args:
+        a: Tokens of the first text
+        b: Tokens of the second text
+        min_length: Shortest run worth reporting
+        max_work: Most seed hits plus token comparisons spent collecting
+            runs; texts repeating the same phrases many times stop there
+            (keeping the runs found so far) instead of growing quadratically
+
+    Returns:
+        List of (start_in_a, start_in_b, length) tiles
+    """
+    seeds: dict[tuple[str, ...], list[int]] = {}
+    for j in range(len(b) - min_length + 1):
+        seeds.setdefault(tuple(b[j:j + min_length]), []).append(j)
+
+    # Tiling below costs at most about the total length of the runs, so
+    # counting that length here bounds both steps
+    runs: list[tuple[int, int, int]] = []
+    work = 0
+    for i in range(len(a) - min_length + 1):
+        for j in seeds.get(tuple(a[i:i + min_length]), ()):
+            work += 1
+            if i and j and a[i - 1] == b[j - 1]:
+                continue  # Inside a run starting earlier on the same diagonal
+            length = min_length
+            while i + length < len(a) and j + length < len(b) and a[i + length] == b[j + length]:
+                length += 1
+            work += length
+            heapq.heappush(runs, (-length, i, j))
+            if work > max_work:
+                break
+        if work > max_work:
+            logger.warning(f"[ALIGNMENT] Work cap of {max_work} reached, alignment is partial")
+            break
+
+    marked_a = bytearray(len(a))
+    marked_b = bytearray(len(b))
+    tiles = []
+    while runs:
+        length, i, j = heapq.heappop(runs)
+        length = -length
+        if not any(marked_a[i:i + length]) and not any(marked_b[j:j + length]):
+            marked_a[i:i + length] = b"\x01" * length
+            marked_b[j:j + length] = b"\x01" * length
+            tiles.append((i, j, length))
+            continue
+
+        # Requeue the untiled pieces of an occluded run
+        piece = None
+        for offset in range(length + 1):
+            free = offset < length and not marked_a[i + offset] and not marked_b[j + offset]
+            if free and piece is None:
+                piece = offset
+            elif not free and piece is not None:
+                if offset - piece >= min_length:
+                    heapq.heappush(runs, (piece - offset, i + piece, j + piece))
+                piece = None
+
+    return tiles
+
+
+def find_matched_spans(
+    submission: str,
+    reference: str,
+    min_tokens: int = MIN_SPAN_TOKENS,
+) -> list[MatchedSpan]:
+    """
+    Locate passages of the submission copied from the reference.
+
+    Args:
+        submission: Raw submitted text
+        reference: Raw reference document content
+        min_tokens: Minimum matching words per span
+
+    Returns:
+        MatchedSpan list ordered by position in the submission
+    """
+    sub_tokens, sub_offsets = tokenize_with_offsets(submission)
+    ref_tokens, ref_offsets = tokenize_with_offsets(reference)
+
+    spans = [
+        MatchedSpan(
+            submission_start=sub_offsets[i][0],
+            submission_end=sub_offsets[i + length - 1][1],
+            reference_start=ref_offsets[j][0],
+            reference_end=ref_offsets[j + length - 1][1],
+        )
+        for i, j, length in greedy_string_tiling(sub_tokens, ref_tokens, min_tokens)
+    ]
+    spans.sort(key=lambda s: s.submission_start)
+
+    logger.debug(f"[ALIGNMENT] Found {len(spans)} matched spans")
+    return spans
@@ -0,0 +1,231 @@
+"""
+BK-tree over the fuzzy vocabulary.
+Metric tree keyed on Levenshtein distance. At FUZZY_THRESHOLD the search
+radius is so wide that a query still visits nearly every node, so in
+practice it is slower than RapidFuzz's C scan; it is kept for comparison
+(see benchmark()) and is not recommended.
+"""
+
+import logging
+import time
+from collections.abc import Callable, Iterable
+
+from rapidfuzz import fuzz, process
+from rapidfuzz.distance import Levenshtein
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def search_radius(word_length: int, threshold: float) -> int:
+    """
+    Largest Levenshtein distance at which fuzz.ratio can still reach threshold.
+
+    fuzz.ratio is 100 * (1 - indel / (len_a + len_b)), the indel distance is
+    at least the Levenshtein distance, and len_b <= len_a + indel, so any
+    word scoring at least the threshold is within
+    len_a * 2 * (100 - threshold) / threshold edits.
+
+    Args:
+        word_length: Length of the query word
+        threshold: Minimum fuzz.ratio (0-100)
+
+    Returns:
+        Levenshtein radius for the BK-tree query
+    """
+    return int(word_length * 2 * (100 - threshold) / threshold)
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree of vocabulary words.
+
+    Each child hangs off its parent under their edit distance; by the
+    triangle inequality a query with radius r at distance d from a node
+    only needs the children at distances d - r .. d + r. Removed words are
+    tombstoned and skipped, and come back if they are added again.
+
+    add_words() may run while other threads query: nodes are only ever
+    appended, and each query iterates over a copy of a node's child edges.
+    """
+
+    def __init__(self) -> None:
+        self._words: list[str] = []
+        self._children: list[dict[int, int]] = []
+        self._parents: list[int] = []
+        self._distances: list[int] = []
+        self._positions: dict[str, int] = {}
+        self._removed: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._positions) - len(self._removed)
+
+    def build(self, words: Iterable[str]) -> None:
+        """
+        Build the tree from scratch.
+
+        Args:
+            words: Vocabulary words
+        """
+        self.__init__()
+        self.add_words(words)
+        logger.info(f"[BKTREE] Indexed {len(self._words)} words")
+
+    def add_words(self, words: Iterable[str]) -> None:
+        """Insert new words (or restore removed ones)."""
+        for word in words:
+            if word in self._positions:
+                self._removed.discard(word)
+                continue
+            if not self._words:
+                self._append(word, -1, 0)
+                continue
+
+            node = 0
+            while True:
+                distance = Levenshtein.distance(word, self._words[node])
+                child = self._children[node].get(distance)
+                if child is None:
+                    self._children[node][distance] = len(self._words)
+                    self._append(word, node, distance)
+                    break
+                node = child
+
+    def remove_words(self, words: Iterable[str]) -> None:
+        """Tombstone words that left the vocabulary."""
+        self._removed.update(word for word in words if word in self._positions)
+
+    def query(self, word: str, radius: int) -> list[tuple[str, int]]:
+        """
+        Every live word within radius edits of the query.
+
+        Args:
+            word: Query word
+            radius: Maximum Levenshtein distance
+
+        Returns:
+            List of (word, distance) pairs
+        """
+        return self._search(word, radius)[0]
+
+    def _search(self, word: str, radius: int) -> tuple[list[tuple[str, int]], int]:
+        """query() plus the number of nodes compared against the word."""
+        if not self._words:
+            return [], 0
+
+        found = []
+        visited = 0
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            visited += 1
+            candidate = self._words[node]
+            distance = Levenshtein.distance(word, candidate)
+            if distance <= radius and candidate not in self._removed:
+                found.append((candidate, distance))
+            for edge, child in tuple(self._children[node].items()):
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return found, visited
+
+    def closest(
+        self,
+        word: str,
+        threshold: float,
+        frequency: Callable[[str], int],
+    ) -> str | None:
+        """
+        Best fuzz.ratio match at or above threshold, as extractOne would find.
+
+        Args:
+            word: Possibly misspelled word
+            threshold: Minimum fuzz.ratio (0-100)
+            frequency: Corpus frequency of a vocabulary word, for tie-breaks
+
+        Returns:
+            The highest-scoring word (most frequent on ties), or None
+        """
+        best = None
+        best_key = None
+        for candidate, _ in self.query(word, search_radius(len(word), threshold)):
+            score = fuzz.ratio(word, candidate)
+            if score < threshold:
+                continue
+            key = (-score, -frequency(candidate), candidate)
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
+
+    def to_dict(self) -> dict:
+        """Serializable form of the tree (see from_dict)."""
+        return {
+            "words": self._words,
+            "parents": self._parents,
+            "distances": self._distances,
+            "removed": sorted(self._removed),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BKTree":
+        """Rebuild a tree written by to_dict() without recomputing distances."""
+        tree = cls()
+        for word, parent, distance in zip(data["words"], data["parents"], data["distances"]):
+            if parent >= 0:
+                tree._children[parent][distance] = len(tree._words)
+            tree._append(word, parent, distance)
+        tree._removed = set(data["removed"])
+        return tree
+
+    def _append(self, word: str, parent: int, distance: int) -> None:
+        self._positions[word] = len(self._words)
+        self._words.append(word)
+        self._children.append({})
+        self._parents.append(parent)
+        self._distances.append(distance)
+
+
+def benchmark(
+    tree: BKTree,
+    vocabulary: Iterable[str],
+    tokens: list[str],
+    threshold: float,
+) -> dict[str, float]:
+    """
+    Compare BK-tree lookups against a RapidFuzz extractOne linear scan.
+
+    Args:
+        tree: BK-tree over the vocabulary
+        vocabulary: The same vocabulary words
+        tokens: Out-of-vocabulary words to correct
+        threshold: Minimum fuzz.ratio (0-100)
+
+    Returns:
+        Mean per-token latency (ms) of each method, the mean fraction of
+        the tree's nodes a query compared against, and how often both agree
+        on the best score
+    """
+    words = list(vocabulary)
+    scan_ms = tree_ms = 0.0
+    visited = agree = 0
+
+    for token in tokens:
+        start = time.perf_counter()
+        expected = process.extractOne(token, words, scorer=fuzz.ratio, score_cutoff=threshold)
+        scan_ms += (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        match = tree.closest(token, threshold, lambda _: 0)
+        tree_ms += (time.perf_counter() - start) * 1000
+
+        visited += tree._search(token, search_radius(len(token), threshold))[1]
+        expected_score = expected[1] if expected else None
+        actual_score = fuzz.ratio(token, match) if match is not None else None
+        agree += expected_score == actual_score
+
+    count = max(len(tokens), 1)
+    return {
+        "scan_ms": scan_ms / count,
+        "bktree_ms": tree_ms / count,
+        "visited_fraction": visited / count / max(len(tree._words), 1),
+        "agreement": agree / count,
+    }
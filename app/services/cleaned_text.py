@@ -0,0 +1,117 @@
+"""
+Cache of cleaned document text.
+Document content is run through clean_text() once, at ingestion, and read
+back by the similarity indexes instead of being re-cleaned on every build.
+"""
+
+import hashlib
+import logging
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models import CleanedText, Document
+from app.services.nlp import CLEANING_PIPELINE_VERSION, clean_text
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Hashes per IN (...) query, below SQLite's bound parameter limit
+_LOOKUP_CHUNK_SIZE = 500
+
+
+def content_hash(content: str) -> str:
+    """SHA-256 hex digest identifying a piece of document content."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def get_cleaned_texts(db: Session, documents: list[Document]) -> list[str]:
+    """
+    Cleaned content of each document, cleaning and caching any not seen before.
+
+    Newly cleaned texts are written in the caller's transaction; they
+    become visible to other workers when the caller commits.
+
+    Args:
+        db: Database session
+        documents: Documents whose content is needed
+
+    Returns:
+        Cleaned texts aligned with documents
+    """
+    hashes = [content_hash(doc.content) for doc in documents]
+
+    cached: dict[str, str] = {}
+    unique_hashes = list(set(hashes))
+    for start in range(0, len(unique_hashes), _LOOKUP_CHUNK_SIZE):
+        chunk = unique_hashes[start:start + _LOOKUP_CHUNK_SIZE]
+        rows = db.query(CleanedText.content_hash, CleanedText.cleaned).filter(
+            CleanedText.pipeline_version == CLEANING_PIPELINE_VERSION,
+            CleanedText.content_hash.in_(chunk),
+        )
+        cached.update(dict(rows))
+
+    new_rows = []
+    for doc, digest in zip(documents, hashes):
+        if digest not in cached:
+            cached[digest] = clean_text(doc.content)
+            new_rows.append(
+                {
+                    "content_hash": digest,
+                    "pipeline_version": CLEANING_PIPELINE_VERSION,
+                    "cleaned": cached[digest],
+                }
+            )
+
+    if new_rows:
+        # Another worker may have cached the same content first
+        db.execute(insert(CleanedText).on_conflict_do_nothing(), new_rows)
+        logger.info(f"[CLEANED] Cleaned and cached {len(new_rows)} document texts")
+
+    return [cached[digest] for digest in hashes]
+
+
+def get_cleaned_text(db: Session, document: Document) -> str:
+    """Cleaned content of a single document. See get_cleaned_texts()."""
+    return get_cleaned_texts(db, [document])[0]
+
+
+def forget_cleaned_text(db: Session, document: Document) -> None:
+    """
+    Delete the cached text of a document about to be deleted, unless another
+    document has the same content. Call this before the deletion is committed.
+
+    Args:
+        db: Database session the deletion is made in
+        document: Document about to be deleted
+    """
+    shared = (
+        db.query(Document.id)
+        .filter(Document.id != document.id, Document.content == document.content)
+        .first()
+    )
+    if shared is None:
+        db.query(CleanedText).filter(
+            CleanedText.content_hash == content_hash(document.content)
+        ).delete(synchronize_session=False)
+
+
+def prune_cleaned_texts(db: Session) -> int:
+    """
+    Delete cached texts produced by older cleaning pipeline versions.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of rows deleted
+    """
+    deleted = (
+        db.query(CleanedText)
+        .filter(CleanedText.pipeline_version != CLEANING_PIPELINE_VERSION)
+        .delete()
+    )
+    db.commit()
+    if deleted:
+        logger.info(f"[CLEANED] Pruned {deleted} stale cleaned texts")
+    return deleted
@@ -0,0 +1,133 @@
+"""
+Collusion detection across a cohort of submissions.
+Flags students whose submissions are similar to each other rather than to
+the reference repository.
+"""
+
+import logging
+from dataclasses import dataclass, field
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Submissions per block of the all-pairs product; bounds peak memory
+DEFAULT_BLOCK_SIZE = 512
+
+
+@dataclass
+class CollusionPair:
+    """Two submissions (by position) whose similarity crosses the threshold."""
+
+    first: int
+    second: int
+    similarity_score: float
+
+
+@dataclass
+class CollusionCluster:
+    """A connected group of mutually similar submissions."""
+
+    members: list[int]
+    pairs: list[CollusionPair] = field(default_factory=list)
+
+
+def similar_pairs(
+    cleaned_texts: list[str],
+    threshold: float,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> list[CollusionPair]:
+    """
+    All pairs of submissions with cosine similarity at or above the threshold.
+
+    TF-IDF is fitted on the cohort itself, so vocabulary every student uses
+    for the assignment topic carries little weight. The similarity matrix is
+    computed in row blocks of block_size, and each block is thresholded
+    before the next is computed, so memory stays bounded for large cohorts.
+
+    Args:
+        cleaned_texts: Cleaned submissions
+        threshold: Minimum cosine similarity for a pair
+        block_size: Rows per block of the all-pairs product
+
+    Returns:
+        CollusionPair list with first < second
+    """
+    if len(cleaned_texts) < 2:
+        return []
+
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=1)
+    try:
+        matrix = vectorizer.fit_transform(cleaned_texts).tocsr()
+    except ValueError as e:
+        # Empty vocabulary (no valid tokens)
+        logger.error(f"[COHORT] TF-IDF failed: {e}")
+        return []
+
+    transposed = matrix.T.tocsc()
+    pairs = []
+    for start in range(0, matrix.shape[0], block_size):
+        block = (matrix[start:start + block_size] @ transposed).tocoo()
+        rows = block.row + start
+        keep = (block.data >= threshold) & (block.col > rows)
+        pairs.extend(
+            CollusionPair(first=int(i), second=int(j), similarity_score=float(score))
+            for i, j, score in zip(rows[keep], block.col[keep], block.data[keep])
+        )
+
+    logger.info(f"[COHORT] {len(pairs)} pairs above {threshold} in {len(cleaned_texts)} submissions")
+    return pairs
+
+
+def find_collusion_clusters(
+    cleaned_texts: list[str],
+    threshold: float,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> list[CollusionCluster]:
+    """
+    Group submissions into clusters of mutually similar work.
+
+    Clusters are the connected components of the graph whose edges are the
+    pairs returned by similar_pairs(); submissions without any edge are left
+    out.
+
+    Args:
+        cleaned_texts: Cleaned submissions
+        threshold: Minimum cosine similarity for an edge
+        block_size: Rows per block of the all-pairs product
+
+    Returns:
+        Clusters sorted by size (largest first), members in input order
+    """
+    pairs = similar_pairs(cleaned_texts, threshold, block_size)
+    if not pairs:
+        return []
+
+    n = len(cleaned_texts)
+    graph = sparse.coo_matrix(
+        (
+            np.ones(len(pairs)),
+            ([p.first for p in pairs], [p.second for p in pairs]),
+        ),
+        shape=(n, n),
+    )
+    _, labels = connected_components(graph, directed=False)
+
+    clusters: dict[int, CollusionCluster] = {}
+    for pair in pairs:
+        label = labels[pair.first]
+        if label not in clusters:
+            clusters[label] = CollusionCluster(
+                members=[int(i) for i in np.flatnonzero(labels == label)]
+            )
+        clusters[label].pairs.append(pair)
+
+    result = list(clusters.values())
+    for cluster in result:
+        cluster.pairs.sort(key=lambda p: p.similarity_score, reverse=True)
+    result.sort(key=lambda c: len(c.members), reverse=True)
+    return result
@@ -3,13 +3,23 @@ Fuzzy matching service for OCR error correction.
 Uses RapidFuzz to correct misspelled words before similarity comparison.
 """
 
+import json
 import logging
-from functools import lru_cache
+import os
+import threading
+import uuid
+from collections import Counter
+from collections.abc import Iterable, Set
 
+import numpy as np
 from rapidfuzz import fuzz, process
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models import Document
+from app.services.bktree import BKTree
+from app.services.result_cache import ResultCache
+from app.services.symspell import SymSpellIndex
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -20,16 +30,342 @@ FUZZY_THRESHOLD = 70
 # Minimum word length to attempt correction (short words have too many false matches)
 MIN_WORD_LENGTH = 4
 
+# Correction engines for correct_text (see settings.FUZZY_ENGINE)
+ENGINE_EXTRACT = "extract"
+ENGINE_SYMSPELL = "symspell"
+ENGINE_BKTREE = "bktree"
+ENGINE_OCR = "ocr"
 
-@lru_cache(maxsize=1)
-def _get_cached_vocabulary_key() -> int:
-    """Returns a cache key that can be invalidated when vocabulary changes."""
-    return id(_get_cached_vocabulary_key)
+# Most confusion-table substitutions combined into one "ocr" engine candidate
+MAX_OCR_SUBSTITUTIONS = 2
 
+# Bump whenever the persisted vocabulary layout changes
+VOCABULARY_FORMAT_VERSION = 2
 
-def build_vocabulary(db: Session) -> set[str]:
+
+def document_words(document: Document) -> Counter[str]:
     """
-    Build a vocabulary of known words from all documents in the database.
+    Count the vocabulary words of a document's content and title.
+
+    Args:
+        document: Reference document
+
+    Returns:
+        Counter of cleaned words of at least MIN_WORD_LENGTH characters
+    """
+    counts: Counter[str] = Counter()
+    for text in (document.content, document.title):
+        # Extract words (simple tokenization), keeping only alphanumeric characters
+        for word in text.lower().split():
+            cleaned = ''.join(c for c in word if c.isalnum())
+            if len(cleaned) >= MIN_WORD_LENGTH:
+                counts[cleaned] += 1
+    return counts
+
+
+class Vocabulary:
+    """
+    Word frequencies of the reference corpus, kept in memory.
+
+    Built once from the documents table (or loaded from disk) and then
+    updated incrementally as documents are added and removed; frequencies
+    are tracked so a word disappears once no document uses it. The word
+    set is replaced, never mutated, so readers can use it without locking.
+    generation is bumped on every change; is_dirty tells whether it moved
+    since the last save() or load(). The SymSpell delete index and the
+    BK-tree over the words are only built for their engines (at build/load
+    time when it is settings.FUZZY_ENGINE, otherwise on first use) and,
+    once built, kept up to date. The BK-tree is saved with the vocabulary
+    for its engine, so a restart does not recompute its distances.
+    corrections memoizes token corrections made against the current words
+    and is emptied on every change.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._built = False
+        self._counts: Counter[str] = Counter()
+        self._document_ids: set[int] = set()
+        self.words: frozenset[str] = frozenset()
+        self._symspell: SymSpellIndex | None = None
+        self._bktree: BKTree | None = None
+        self.generation = 0
+        self._saved_generation = 0
+        self._buckets: tuple[int, dict[int, list[str]]] = (-1, {})
+        self.corrections = ResultCache(settings.CORRECTION_CACHE_SIZE, float("inf"))
+
+    @property
+    def is_built(self) -> bool:
+        """Whether build() or load() has run; until then add/remove are no-ops."""
+        return self._built
+
+    @property
+    def is_dirty(self) -> bool:
+        """Whether the vocabulary changed since it was last saved or loaded."""
+        return self._built and self.generation != self._saved_generation
+
+    @property
+    def symspell(self) -> SymSpellIndex:
+        """SymSpell delete index over the words, built the first time it is needed."""
+        index = self._symspell
+        if index is None:
+            with self._lock:
+                if self._symspell is None:
+                    self._symspell = self._build_symspell()
+                index = self._symspell
+        return index
+
+    @property
+    def bktree(self) -> BKTree:
+        """BK-tree over the words, built the first time it is needed."""
+        tree = self._bktree
+        if tree is None:
+            with self._lock:
+                if self._bktree is None:
+                    self._bktree = self._build_bktree()
+                tree = self._bktree
+        return tree
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def frequency(self, word: str) -> int:
+        """Number of occurrences of a word in the corpus."""
+        return self._counts.get(word, 0)
+
+    def length_buckets(self) -> dict[int, list[str]]:
+        """
+        Vocabulary words grouped by length, most frequent first.
+
+        Rebuilt lazily the first time it is needed after a change.
+
+        Returns:
+            Mapping of word length to the words of that length
+        """
+        generation, buckets = self._buckets
+        if generation == self.generation:
+            return buckets
+
+        with self._lock:
+            buckets: dict[int, list[str]] = {}
+            for word, _ in self._counts.most_common():
+                buckets.setdefault(len(word), []).append(word)
+            self._buckets = (self.generation, buckets)
+        return buckets
+
+    def build(self, db: Session) -> None:
+        """
+        Count the words of every document in the database.
+
+        Args:
+            db: Database session
+        """
+        with self._lock:
+            counts: Counter[str] = Counter()
+            document_ids = set()
+            for doc in db.query(Document).all():
+                counts.update(document_words(doc))
+                document_ids.add(doc.id)
+
+            self._counts = counts
+            self._document_ids = document_ids
+            self._built = True
+            self._changed(frozenset(counts))
+            self._symspell = (
+                self._build_symspell() if settings.FUZZY_ENGINE == ENGINE_SYMSPELL else None
+            )
+            self._bktree = self._build_bktree() if settings.FUZZY_ENGINE == ENGINE_BKTREE else None
+
+        logger.info(f"[FUZZY] Built vocabulary with {len(self.words)} unique words")
+
+    def add(self, document_id: int, counts: Counter[str]) -> None:
+        """
+        Add a stored document's words.
+
+        Args:
+            document_id: ID of the document
+            counts: Output of document_words() for the document
+        """
+        with self._lock:
+            if not self._built or document_id in self._document_ids:
+                return
+            new_words = [word for word in counts if word not in self._counts]
+            self._counts.update(counts)
+            self._document_ids.add(document_id)
+            if self._symspell is not None:
+                self._symspell.add_words(new_words)
+            if self._bktree is not None:
+                self._bktree.add_words(new_words)
+            self._changed(self.words.union(new_words) if new_words else self.words)
+
+    def remove(self, document_id: int, counts: Counter[str]) -> None:
+        """
+        Remove a deleted document's words.
+
+        Args:
+            document_id: ID of the document
+            counts: Output of document_words() for the document
+        """
+        with self._lock:
+            if not self._built or document_id not in self._document_ids:
+                return
+            self._counts.subtract(counts)
+            gone = [word for word in counts if self._counts[word] <= 0]
+            for word in gone:
+                del self._counts[word]
+            self._document_ids.discard(document_id)
+            if self._symspell is not None:
+                self._symspell.remove_words(gone)
+            if self._bktree is not None:
+                self._bktree.remove_words(gone)
+            self._changed(self.words.difference(gone) if gone else self.words)
+
+    def save(self, path: str) -> bool:
+        """
+        Write the vocabulary to a JSON file, replacing it atomically.
+
+        Args:
+            path: Target file
+
+        Returns:
+            True if the file was written
+        """
+        with self._lock:
+            if not self._built:
+                return False
+            generation = self.generation
+            data = {
+                "format_version": VOCABULARY_FORMAT_VERSION,
+                "document_ids": sorted(self._document_ids),
+                "counts": dict(self._counts),
+            }
+            if self._bktree is not None and settings.FUZZY_ENGINE == ENGINE_BKTREE:
+                data["bktree"] = self._bktree.to_dict()
+
+        tmp_path = f"{path}.tmp-{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"[FUZZY] Could not save vocabulary to {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+        self._saved_generation = generation
+        logger.info(f"[FUZZY] Saved vocabulary of {len(data['counts'])} words to {path}")
+        return True
+
+    def load(self, path: str) -> bool:
+        """
+        Read a vocabulary written by save().
+
+        Args:
+            path: Vocabulary file
+
+        Returns:
+            True if a compatible file was loaded
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"[FUZZY] Could not load vocabulary from {path}: {e}")
+            return False
+        if data.get("format_version") != VOCABULARY_FORMAT_VERSION:
+            return False
+
+        with self._lock:
+            self._counts = Counter(data["counts"])
+            self._document_ids = set(data["document_ids"])
+            self._built = True
+            self._changed(frozenset(self._counts))
+            self._symspell = (
+                self._build_symspell() if settings.FUZZY_ENGINE == ENGINE_SYMSPELL else None
+            )
+            self._saved_generation = self.generation
+            self._bktree = None
+            if settings.FUZZY_ENGINE == ENGINE_BKTREE:
+                if "bktree" in data:
+                    self._bktree = BKTree.from_dict(data["bktree"])
+                else:
+                    self._bktree = self._build_bktree()
+            if (self._bktree is not None) != ("bktree" in data):
+                # Have the next save add or drop the tree
+                self._saved_generation = -1
+
+        logger.info(f"[FUZZY] Loaded vocabulary of {len(self.words)} words from {path}")
+        return True
+
+    def sync(self, db: Session) -> None:
+        """
+        Bring a loaded vocabulary up to date with the documents table.
+
+        Documents missing from the vocabulary are added. Word counts of
+        documents deleted since the save are unknown, so any deletion
+        triggers a full rebuild instead.
+
+        Args:
+            db: Database session
+        """
+        with self._lock:
+            stored_ids = {document_id for (document_id,) in db.query(Document.id)}
+            if self._document_ids - stored_ids:
+                self.build(db)
+                return
+
+            missing = stored_ids - self._document_ids
+            if missing:
+                for doc in db.query(Document).filter(Document.id.in_(missing)).all():
+                    self.add(doc.id, document_words(doc))
+
+        logger.info(f"[FUZZY] Synced vocabulary with database: +{len(missing)}")
+
+    def _build_symspell(self) -> SymSpellIndex:
+        """SymSpell index over the current words. Caller holds the lock."""
+        index = SymSpellIndex()
+        index.build(self.words)
+        return index
+
+    def _build_bktree(self) -> BKTree:
+        """BK-tree over the current words. Caller holds the lock."""
+        tree = BKTree()
+        tree.build(sorted(self.words))
+        return tree
+
+    def _changed(self, words: frozenset[str]) -> None:
+        """Publish a new word set and bump the generation. Caller holds the lock."""
+        self.words = words
+        self.generation += 1
+        self.corrections.clear()
+
+
+# Process-wide vocabulary shared by all requests
+corpus_vocabulary = Vocabulary()
+
+
+def get_vocabulary(db: Session) -> Vocabulary:
+    """
+    Return the shared vocabulary, building it on first use.
+
+    Args:
+        db: Database session used if the vocabulary still needs building
+
+    Returns:
+        The built Vocabulary
+    """
+    if not corpus_vocabulary.is_built:
+        corpus_vocabulary.build(db)
+    return corpus_vocabulary
+
+
+def build_vocabulary(db: Session) -> frozenset[str]:
+    """
+    Get the vocabulary of known words from all documents in the database.
+
+    The vocabulary is built once and then maintained incrementally (see
+    Vocabulary), so this is a cheap lookup after the first call.
 
     Args:
         db: Database session
@@ -37,30 +373,50 @@ def build_vocabulary(db: Session) -> set[str]:
     Returns:
         Set of unique words from all documents
     """
-    documents = db.query(Document).all()
-    vocabulary = set()
+    return get_vocabulary(db).words
 
-    for doc in documents:
-        # Extract words from content (simple tokenization)
-        words = doc.content.lower().split()
-        for word in words:
-            # Clean the word: keep only alphanumeric characters
-            cleaned = ''.join(c for c in word if c.isalnum())
-            if len(cleaned) >= MIN_WORD_LENGTH:
-                vocabulary.add(cleaned)
 
-        # Also add words from title
-        title_words = doc.title.lower().split()
-        for word in title_words:
-            cleaned = ''.join(c for c in word if c.isalnum())
-            if len(cleaned) >= MIN_WORD_LENGTH:
-                vocabulary.add(cleaned)
+_save_lock = threading.Lock()
+_save_timer: threading.Timer | None = None
+
 
-    logger.info(f"[FUZZY] Built vocabulary with {len(vocabulary)} unique words")
-    return vocabulary
+def save_vocabulary() -> None:
+    """
+    Persist the shared vocabulary to VOCABULARY_PATH now, if configured and
+    changed since the last save. Cancels a save scheduled by
+    schedule_vocabulary_save(); call it on shutdown to flush one.
+    """
+    global _save_timer
+    with _save_lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+            _save_timer = None
+    if settings.VOCABULARY_PATH and corpus_vocabulary.is_dirty:
+        corpus_vocabulary.save(settings.VOCABULARY_PATH)
 
 
-def correct_word(word: str, vocabulary: set[str]) -> str:
+def schedule_vocabulary_save() -> None:
+    """
+    Save the shared vocabulary VOCABULARY_SAVE_DELAY seconds from now in a
+    background thread. Changes made meanwhile join the pending save, so a
+    burst of ingestions rewrites the file once.
+    """
+    global _save_timer
+    if not settings.VOCABULARY_PATH:
+        return
+    if settings.VOCABULARY_SAVE_DELAY <= 0:
+        save_vocabulary()
+        return
+    with _save_lock:
+        if _save_timer is not None:
+            return
+        _save_timer = threading.Timer(settings.VOCABULARY_SAVE_DELAY, save_vocabulary)
+        _save_timer.name = "vocabulary-save"
+        _save_timer.daemon = True
+        _save_timer.start()
+
+
+def correct_word(word: str, vocabulary: Set[str]) -> str:
     """
     Attempt to correct a single word using fuzzy matching against the vocabulary.
 
@@ -94,13 +450,211 @@ def correct_word(word: str, vocabulary: set[str]) -> str:
     return word
 
 
-def correct_text(text: str, db: Session) -> str:
+def correct_words_extract(words: Iterable[str], vocabulary: Vocabulary) -> dict[str, str]:
+    """
+    Correct many distinct words with batched RapidFuzz scoring.
+
+    fuzz.ratio can only reach FUZZY_THRESHOLD between words whose lengths
+    are close enough, so the words are grouped by length and each group is
+    scored in one process.cdist call against just the vocabulary buckets in
+    that length range, spread over settings.FUZZY_WORKERS threads. Ties
+    between the best-scoring words go to the most frequent one (then the
+    alphabetically first), as in BKTree.closest.
+
+    Args:
+        words: Distinct out-of-vocabulary words
+        vocabulary: Shared corpus vocabulary
+
+    Returns:
+        Mapping of each word that has a match to its correction
+    """
+    groups: dict[int, list[str]] = {}
+    for word in words:
+        groups.setdefault(len(word), []).append(word)
+    if not groups:
+        return {}
+
+    buckets = vocabulary.length_buckets()
+    corrections = {}
+    for length, queries in groups.items():
+        shortest = -(-length * FUZZY_THRESHOLD // (200 - FUZZY_THRESHOLD))
+        longest = length * (200 - FUZZY_THRESHOLD) // FUZZY_THRESHOLD
+        choices = [
+            word
+            for size in range(shortest, longest + 1)
+            for word in buckets.get(size, ())
+        ]
+        if not choices:
+            continue
+
+        scores = process.cdist(
+            queries,
+            choices,
+            scorer=fuzz.ratio,
+            score_cutoff=FUZZY_THRESHOLD,
+            dtype=np.float32,
+            workers=settings.FUZZY_WORKERS,
+        )
+        best = scores.max(axis=1)
+        for query, row, score in zip(queries, scores, best):
+            if score > 0:
+                tied = (choices[column] for column in np.flatnonzero(row == score))
+                corrections[query] = min(tied, key=lambda word: (-vocabulary.frequency(word), word))
+
+    return corrections
+
+
+def correct_word_symspell(word: str, vocabulary: Vocabulary) -> str:
+    """
+    Correct a single word through the vocabulary's SymSpell index.
+
+    Candidates within two edits are found by dictionary lookups instead of
+    a scan of the whole vocabulary; the closest one still scoring at least
+    FUZZY_THRESHOLD wins, the most frequent on ties.
+
+    Args:
+        word: The potentially misspelled word
+        vocabulary: Shared corpus vocabulary
+
+    Returns:
+        The corrected word, or the original if no good match found
+    """
+    if not word or len(word) < MIN_WORD_LENGTH or word in vocabulary.words:
+        return word
+
+    match = vocabulary.symspell.lookup(word, vocabulary.frequency, FUZZY_THRESHOLD)
+    if match is not None:
+        logger.debug(f"[FUZZY] Corrected '{word}' -> '{match}' (symspell)")
+        return match
+
+    return word
+
+
+def correct_word_bktree(word: str, vocabulary: Vocabulary) -> str:
+    """
+    Correct a single word through the vocabulary's BK-tree.
+
+    The Levenshtein radius searched is derived from FUZZY_THRESHOLD and the
+    word length, so the tree finds every word extractOne would accept. That
+    radius is wide enough that nearly every node is compared, so this is
+    slower than the "extract" engine; it is not recommended.
+
+    Args:
+        word: The potentially misspelled word
+        vocabulary: Shared corpus vocabulary
+
+    Returns:
+        The corrected word, or the original if no good match found
+    """
+    if not word or len(word) < MIN_WORD_LENGTH or word in vocabulary.words:
+        return word
+
+    match = vocabulary.bktree.closest(word, FUZZY_THRESHOLD, vocabulary.frequency)
+    if match is not None:
+        logger.debug(f"[FUZZY] Corrected '{word}' -> '{match}' (bktree)")
+        return match
+
+    return word
+
+
+def ocr_candidates(
+    word: str,
+    confusions: dict[str, dict[str, float]],
+    max_substitutions: int = MAX_OCR_SUBSTITUTIONS,
+) -> dict[str, float]:
+    """
+    Spellings the word may have had before typical OCR misreads.
+
+    Every occurrence of a misread in the confusion table may be replaced by
+    one of its intended texts; up to max_substitutions non-overlapping
+    replacements are combined and their weights multiplied.
+
+    Args:
+        word: Word as read by OCR
+        confusions: Misread text -> {intended text: weight}
+        max_substitutions: Most replacements per candidate
+
+    Returns:
+        Mapping of candidate spelling to its weight (the best one if several
+        substitution paths lead to it)
+    """
+    sites = [
+        (start, start + len(misread), intended, weight)
+        for misread, replacements in confusions.items()
+        for start in range(len(word))
+        if word.startswith(misread, start)
+        for intended, weight in replacements.items()
+    ]
+    sites.sort()
+
+    candidates: dict[str, float] = {}
+
+    def expand(first: int, end: int, parts: list[str], weight: float, depth: int) -> None:
+        for i in range(first, len(sites)):
+            start, stop, intended, site_weight = sites[i]
+            if start < end:
+                continue
+            chosen = parts + [word[end:start], intended]
+            candidate = "".join(chosen) + word[stop:]
+            candidate_weight = weight * site_weight
+            if candidate_weight > candidates.get(candidate, 0.0):
+                candidates[candidate] = candidate_weight
+            if depth + 1 < max_substitutions:
+                expand(i + 1, stop, chosen, candidate_weight, depth + 1)
+
+    expand(0, 0, [], 1.0, 0)
+    return candidates
+
+
+def correct_word_ocr(word: str, vocabulary: Vocabulary) -> str:
+    """
+    Correct a single word by undoing likely OCR misreads.
+
+    Candidates from the settings.OCR_CONFUSIONS table are checked against
+    the vocabulary with set lookups; the highest-weighted known one wins,
+    the most frequent on ties. No fuzzy scoring is involved.
+
+    Args:
+        word: The potentially misspelled word
+        vocabulary: Shared corpus vocabulary
+
+    Returns:
+        The corrected word, or the original if no candidate is a known word
+    """
+    if not word or len(word) < MIN_WORD_LENGTH or word in vocabulary.words:
+        return word
+
+    known = [
+        (weight, vocabulary.frequency(candidate), candidate)
+        for candidate, weight in ocr_candidates(word, settings.OCR_CONFUSIONS).items()
+        if candidate in vocabulary.words
+    ]
+    if known:
+        match = max(known)[2]
+        logger.debug(f"[FUZZY] Corrected '{word}' -> '{match}' (ocr)")
+        return match
+
+    return word
+
+
+def correct_text(
+    text: str,
+    db: Session,
+    vocabulary: Vocabulary | None = None,
+    engine: str | None = None,
+) -> str:
     """
     Correct OCR errors in text using fuzzy matching against document vocabulary.
 
     Args:
         text: The OCR text with potential errors
         db: Database session
+        vocabulary: Vocabulary to use instead of fetching the shared one
+            (lets worker threads avoid the session)
+        engine: "extract" (RapidFuzz scan of the vocabulary), "symspell"
+            (delete-index lookups), "bktree" (BK-tree radius query) or "ocr"
+            (confusion-table lookups, then "extract" for the rest);
+            default from settings
 
     Returns:
         Text with corrected words
@@ -108,33 +662,67 @@ def correct_text(text: str, db: Session) -> str:
     if not text:
         return text
 
-    # Build vocabulary from database
-    vocabulary = build_vocabulary(db)
+    # Use the shared corpus vocabulary
+    if vocabulary is None:
+        vocabulary = get_vocabulary(db)
+    if engine is None:
+        engine = settings.FUZZY_ENGINE
 
-    if not vocabulary:
+    if not vocabulary.words:
         logger.warning("[FUZZY] Empty vocabulary, skipping correction")
         return text
 
-    # Tokenize and correct each word
+    # Tokenize, then correct each distinct out-of-vocabulary word once
     words = text.lower().split()
-    corrected_words = []
-    corrections_made = 0
-
-    for word in words:
-        # Preserve non-alphanumeric parts
-        cleaned = ''.join(c for c in word if c.isalnum())
-
-        if len(cleaned) >= MIN_WORD_LENGTH:
-            corrected = correct_word(cleaned, vocabulary)
-            if corrected != cleaned:
-                corrections_made += 1
-            corrected_words.append(corrected)
+    cleaned_words = [''.join(c for c in word if c.isalnum()) for word in words]
+    unknown = {
+        cleaned
+        for cleaned in cleaned_words
+        if len(cleaned) >= MIN_WORD_LENGTH and cleaned not in vocabulary.words
+    }
+
+    # Reuse corrections already made for earlier submissions; keys carry the
+    # generation so a result racing with a vocabulary change is never served
+    memo = vocabulary.corrections
+    generation = vocabulary.generation
+    corrections = {}
+    pending = []
+    for word in unknown:
+        corrected = memo.get((generation, engine, word))
+        if corrected is None:
+            pending.append(word)
         else:
-            corrected_words.append(cleaned)
+            corrections[word] = corrected
+
+    if engine == ENGINE_SYMSPELL:
+        found = {word: correct_word_symspell(word, vocabulary) for word in pending}
+    elif engine == ENGINE_BKTREE:
+        found = {word: correct_word_bktree(word, vocabulary) for word in pending}
+    elif engine == ENGINE_OCR:
+        found = {word: correct_word_ocr(word, vocabulary) for word in pending}
+        found = {word: match for word, match in found.items() if match != word}
+        found.update(
+            correct_words_extract([word for word in pending if word not in found], vocabulary)
+        )
+    else:
+        found = correct_words_extract(pending, vocabulary)
+
+    for word in pending:
+        corrections[word] = found.get(word, word)
+        memo.put((generation, engine, word), corrections[word])
+
+    corrected_words = [corrections.get(cleaned, cleaned) for cleaned in cleaned_words]
+    corrections_made = sum(
+        corrected != cleaned for corrected, cleaned in zip(corrected_words, cleaned_words)
+    )
 
     corrected_text = ' '.join(corrected_words)
 
     logger.info(f"[FUZZY] Made {corrections_made} corrections out of {len(words)} words")
+    logger.info(
+        f"[FUZZY] Correction memo: {len(unknown) - len(pending)}/{len(unknown)} unknown words "
+        f"reused (hits: {memo.hits}, misses: {memo.misses})"
+    )
     logger.info(f"[FUZZY] Corrected text preview: {corrected_text[:150]!r}")
 
     return corrected_text
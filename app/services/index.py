@@ -0,0 +1,1365 @@
+"""
+Persistent corpus index for similarity search.
+Holds a TF-IDF model fitted once over the reference documents so that
+each request only has to vectorize the submission.
+"""
+
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Document
+from app.services.cleaned_text import get_cleaned_texts
+from app.services.nlp import clean_text
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bump whenever the on-disk snapshot layout changes
+SNAPSHOT_FORMAT_VERSION = 6
+
+# File in the snapshot directory naming the published snapshot
+SNAPSHOT_POINTER = "CURRENT"
+
+# Unpublished or superseded snapshots are deleted once this much older
+SNAPSHOT_GRACE_SECONDS = 300
+
+# Random hyperplanes per SimHash signature (multiple of 64)
+SIMHASH_BITS = 128
+
+_SNAPSHOT_ARRAYS = (
+    "idf",
+    "alive",
+    "csr_data",
+    "csr_indices",
+    "csr_indptr",
+    "csc_data",
+    "csc_indices",
+    "csc_indptr",
+    "delta_data",
+    "delta_indices",
+    "delta_indptr",
+    "simhash",
+    "hyperplanes",
+)
+
+
+@dataclass
+class IndexedDocument:
+    """Metadata kept in memory for every document in the index."""
+
+    document_id: int
+    title: str
+    category: str
+    source: str | None
+
+
+@dataclass
+class CategoryPartition:
+    """Rows of one category, located without copying any matrix data."""
+
+    # (start, end) row ranges of the fitted matrix, scored as zero-copy views
+    ranges: list[tuple[int, int]]
+    # Row numbers of the category's appended (delta) rows
+    delta_rows: np.ndarray
+
+
+@dataclass
+class IndexState:
+    """
+    Immutable snapshot of the index.
+
+    Mutations build a new state and swap it in, so readers never see a
+    half-updated matrix.
+    """
+
+    vectorizer: TfidfVectorizer | None = None
+    # Rows of the last fit; never modified until the next compaction
+    matrix: sparse.csr_matrix | None = None
+    # Same matrix in CSC layout: column t holds term t's posting list
+    postings: sparse.csc_matrix | None = None
+    # Rows appended since the last fit, numbered after the matrix rows
+    delta: sparse.csr_matrix | None = None
+    delta_postings: sparse.csc_matrix | None = None
+    # Largest weight in each posting list (MaxScore upper bounds)
+    term_bounds: np.ndarray | None = None
+    documents: list[IndexedDocument] = field(default_factory=list)
+    alive: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=bool))
+    rows: dict[int, int] = field(default_factory=dict)
+    fitted_size: int = 0
+    # Identifies the fit the matrix came from; appends keep it, refits change it
+    fit_id: str = ""
+    pending_changes: int = 0
+    # Out-of-vocabulary terms of appended rows, dropped from their vectors
+    appended_terms: frozenset[str] = frozenset()
+    # Packed SimHash bits of every row, shape (n_rows, SIMHASH_BITS // 64)
+    simhash: np.ndarray | None = None
+    # Random hyperplanes behind the signatures, shape (n_features, SIMHASH_BITS)
+    hyperplanes: np.ndarray | None = None
+    # Per-category sub-matrices, keyed by Document.category
+    categories: dict[str, CategoryPartition] = field(default_factory=dict)
+
+    def stacked(self) -> sparse.csr_matrix | None:
+        """Fitted and appended rows as one matrix (a copy if rows were appended)."""
+        if self.matrix is None or self.delta.shape[0] == 0:
+            return self.matrix
+        return sparse.vstack([self.matrix, self.delta], format="csr")
+
+
+class CorpusIndex:
+    """
+    TF-IDF index over the reference document repository.
+
+    The vectorizer vocabulary/IDF and the L2-normalized document matrix are
+    computed once by fit(); the score_* methods then only transform the
+    query text and walk or multiply the stored matrix. Document rows are
+    stored as float32 with int32 indices, half the size of scikit-learn's
+    float64 output.
+
+    Documents can be appended or removed without a refit. Appended rows are
+    vectorized with the existing vocabulary/IDF into a small delta matrix,
+    so an append never copies the fitted matrix, and removed rows are
+    tombstoned; once the number of such changes exceeds
+    INDEX_COMPACTION_RATIO of the fitted corpus, needs_compaction is set and
+    the next compact() refits from the database.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._state = IndexState()
+        self._generation = 0
+
+    @property
+    def is_fitted(self) -> bool:
+        """Whether the index has been built."""
+        return self._state.vectorizer is not None
+
+    @property
+    def documents(self) -> list[IndexedDocument]:
+        """Metadata of indexed documents, aligned with matrix rows."""
+        return self._state.documents
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every change to the indexed documents."""
+        return self._generation
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Whether enough appends/deletes have accumulated to warrant a refit."""
+        state = self._state
+        limit = settings.INDEX_COMPACTION_RATIO * max(state.fitted_size, 1)
+        return state.pending_changes > limit
+
+    def __len__(self) -> int:
+        """Number of live (non-tombstoned) documents."""
+        return int(self._state.alive.sum())
+
+    def get(self, document_id: int) -> IndexedDocument | None:
+        """Metadata of a live indexed document, or None if not indexed."""
+        state = self._state
+        row = state.rows.get(document_id)
+        return state.documents[row] if row is not None else None
+
+    def build(self, db: Session) -> None:
+        """
+        Fit the index over every document in the database.
+
+        The database read and the fit run without the lock, so appends and
+        deletes keep going meanwhile; those that landed during the fit are
+        replayed onto the new state before it is swapped in.
+
+        Args:
+            db: Database session
+        """
+        start = self._state
+        documents = db.query(Document).all()
+        state = _fit_state(documents, get_cleaned_texts(db, documents))
+
+        with self._lock:
+            current = self._state
+            if current is not start and state.vectorizer is not None:
+                state = _replay_changes(db, state, current)
+            self._swap(state)
+
+        shape = state.matrix.shape if state.matrix is not None else (0, 0)
+        logger.info(f"[INDEX] Built corpus index, matrix shape: {shape}")
+
+    def fit(
+        self,
+        documents: list[Document],
+        cleaned_texts: list[str] | None = None,
+    ) -> None:
+        """
+        Fit the TF-IDF model and document matrix from scratch.
+
+        Rows are stored grouped by category, so each category of the fitted
+        matrix is one contiguous row range.
+
+        Args:
+            documents: Reference documents to index
+            cleaned_texts: Cleaned content aligned with documents
+                (cleaned here if omitted)
+        """
+        state = _fit_state(documents, cleaned_texts)
+        with self._lock:
+            self._swap(state)
+
+        shape = state.matrix.shape if state.matrix is not None else (0, 0)
+        logger.info(f"[INDEX] Fitted corpus index, matrix shape: {shape}")
+
+    def save(self, path: str) -> bool:
+        """
+        Write the index to a versioned on-disk snapshot.
+
+        Each snapshot is a uniquely named subdirectory of .npy arrays plus a
+        JSON manifest; it is published by atomically replacing the pointer
+        file naming the current one. Workers saving at the same time
+        therefore never touch each other's files, and readers never see a
+        partial snapshot. Failures are logged and the index keeps serving
+        from memory.
+
+        Args:
+            path: Snapshot directory
+
+        Returns:
+            True if the snapshot was written and published
+        """
+        state = self._state
+        if state.vectorizer is None:
+            return False
+
+        name = f"snapshot-{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        try:
+            os.makedirs(path, exist_ok=True)
+            tmp_path = os.path.join(path, f"{name}.tmp")
+            _write_snapshot(state, tmp_path)
+            os.rename(tmp_path, os.path.join(path, name))
+
+            pointer_tmp = os.path.join(path, f"{SNAPSHOT_POINTER}.{name}.tmp")
+            with open(pointer_tmp, "w", encoding="utf-8") as f:
+                f.write(name)
+            os.replace(pointer_tmp, os.path.join(path, SNAPSHOT_POINTER))
+        except OSError as e:
+            logger.error(f"[INDEX] Could not save snapshot to {path}: {e}")
+            return False
+
+        prune_stale_entries(
+            path, ("snapshot-", f"{SNAPSHOT_POINTER}.", "manifest.json", *_SNAPSHOT_ARRAYS), {name}
+        )
+        logger.info(f"[INDEX] Saved snapshot of {len(state.documents)} rows to {path}/{name}")
+        return True
+
+    def load(self, path: str) -> bool:
+        """
+        Open an on-disk snapshot, memory-mapping its arrays.
+
+        Workers opening the same snapshot share its pages; appends and
+        deletes after loading build new in-memory arrays as usual.
+
+        Args:
+            path: Snapshot directory
+
+        Returns:
+            True if a compatible snapshot was loaded
+        """
+        try:
+            with open(os.path.join(path, SNAPSHOT_POINTER), encoding="utf-8") as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.warning(f"[INDEX] Could not read snapshot pointer in {path}: {e}")
+            return False
+
+        try:
+            state = _read_snapshot(os.path.join(path, name))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"[INDEX] Could not load snapshot from {path}: {e}")
+            return False
+        if state is None:
+            return False
+
+        with self._lock:
+            self._swap(state)
+
+        logger.info(f"[INDEX] Loaded snapshot of {len(state.documents)} rows from {path}")
+        return True
+
+    def sync(self, db: Session) -> None:
+        """
+        Bring a loaded index up to date with the documents table.
+
+        Only document ids are read in full; rows missing from the index are
+        appended and indexed rows no longer in the database are tombstoned.
+
+        Args:
+            db: Database session
+        """
+        with self._lock:
+            stored_ids = {document_id for (document_id,) in db.query(Document.id)}
+            indexed_ids = set(self._state.rows)
+
+            missing = stored_ids - indexed_ids
+            if missing:
+                documents = db.query(Document).filter(Document.id.in_(missing)).all()
+                self.add_documents(documents, get_cleaned_texts(db, documents))
+            removed = indexed_ids - stored_ids
+            if removed:
+                self.remove_documents(list(removed))
+
+        logger.info(f"[INDEX] Synced with database: +{len(missing)} / -{len(removed)}")
+
+    def add_documents(
+        self,
+        documents: list[Document],
+        cleaned_texts: list[str] | None = None,
+    ) -> None:
+        """
+        Append documents to the index using the current vocabulary and IDF.
+
+        Terms outside the fitted vocabulary are ignored until the next
+        compaction. If the index has not been fitted yet this is a no-op;
+        the first get_corpus_index() call will build it from the database.
+
+        Args:
+            documents: Newly stored documents (must have ids)
+            cleaned_texts: Cleaned content aligned with documents
+                (cleaned here if omitted)
+        """
+        if not documents:
+            return
+
+        with self._lock:
+            state = self._state
+            if state.vectorizer is None:
+                return
+            self._swap(_appended(state, documents, cleaned_texts))
+
+        logger.info(f"[INDEX] Appended {len(documents)} documents")
+
+    def remove_documents(self, document_ids: list[int]) -> None:
+        """
+        Tombstone documents so they are no longer returned by queries.
+
+        Args:
+            document_ids: Database ids of removed documents
+        """
+        with self._lock:
+            state, removed = _tombstoned(self._state, document_ids)
+            if removed:
+                self._swap(state)
+
+        logger.info(f"[INDEX] Tombstoned {removed} documents")
+
+    def memory_usage(self) -> dict[str, int]:
+        """
+        Bytes held by each component of the current index.
+
+        Memory-mapped snapshot arrays are counted at their full size even
+        though their pages are shared between workers.
+
+        Returns:
+            Mapping of component name to size in bytes
+        """
+        state = self._state
+        vectorizer = state.vectorizer
+        return {
+            "matrix": _sparse_nbytes(state.matrix),
+            "postings": _sparse_nbytes(state.postings),
+            "delta": _sparse_nbytes(state.delta) + _sparse_nbytes(state.delta_postings),
+            "categories": sum(
+                part.delta_rows.nbytes + 16 * len(part.ranges)
+                for part in state.categories.values()
+            ),
+            "simhash": state.simhash.nbytes if state.simhash is not None else 0,
+            "hyperplanes": state.hyperplanes.nbytes if state.hyperplanes is not None else 0,
+            "term_bounds": state.term_bounds.nbytes if state.term_bounds is not None else 0,
+            "idf": vectorizer.idf_.nbytes if vectorizer is not None else 0,
+            "alive": state.alive.nbytes,
+        }
+
+    def _swap(self, state: IndexState) -> None:
+        """Install a new state and bump the generation. Caller holds the lock."""
+        self._state = state
+        self._generation += 1
+
+    def compact(self, db: Session) -> None:
+        """
+        Refit vocabulary, IDF and matrix, dropping tombstoned rows.
+
+        Args:
+            db: Database session
+        """
+        logger.info(
+            f"[INDEX] Compacting after {self._state.pending_changes} pending changes"
+        )
+        self.build(db)
+
+    @property
+    def state(self) -> IndexState:
+        """
+        The current index snapshot.
+
+        Snapshots are never mutated, so a caller can read several fields
+        from one without them changing underneath it.
+        """
+        return self._state
+
+    def transform(
+        self,
+        cleaned_text: str,
+        state: IndexState | None = None,
+    ) -> sparse.csr_matrix | None:
+        """
+        Vectorize already-cleaned query text against the fitted vocabulary.
+
+        While the vocabulary is below max_features, terms unknown to the
+        corpus still count towards the vector norm (with the IDF of an unseen
+        term), matching what fitting over the query and corpus together
+        would give.
+
+        Args:
+            cleaned_text: Output of clean_text()
+            state: Snapshot whose vocabulary to use (default: current)
+
+        Returns:
+            L2-normalized 1 x n_features sparse row, or None if the query
+            has no weight at all
+        """
+        return _transform(state if state is not None else self._state, cleaned_text)
+
+    def score_sharded(
+        self,
+        cleaned_text: str,
+        top_n: int | None,
+        min_score: float | None = None,
+        shards: int = 1,
+    ) -> tuple[np.ndarray, np.ndarray, list[IndexedDocument]]:
+        """
+        Score every document in parallel row shards and merge per-shard top-k.
+
+        Each shard is a zero-copy view over a contiguous row range of the
+        document matrix; appended rows are scored as one extra shard.
+        SciPy's sparse kernels release the GIL, so shards run concurrently
+        on a thread pool without copying the index into worker processes.
+
+        Args:
+            cleaned_text: Output of clean_text()
+            top_n: Number of winners, or None for every positive score
+            min_score: Drop scores below this cut-off before selection
+            shards: Number of row shards to score concurrently
+
+        Returns:
+            Tuple of (rows, scores, documents) for the winners, highest first.
+            Only positive scores are returned.
+        """
+        state = self._state
+        query = _transform(state, cleaned_text)
+        empty = np.zeros(0, dtype=np.int64)
+
+        if state.matrix is None or query is None:
+            return empty, np.zeros(0), state.documents
+
+        dense_query = np.asarray(query.todense()).ravel()
+        cutoff = min_score if min_score is not None else 0.0
+        n_rows = state.matrix.shape[0]
+        bounds = np.linspace(0, n_rows, max(1, min(shards, n_rows)) + 1).astype(int)
+        pieces = [
+            (_row_slice(state.matrix, start, end), start)
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        if state.delta.shape[0]:
+            pieces.append((state.delta, n_rows))
+
+        def score_shard(piece: tuple[sparse.csr_matrix, int]) -> tuple[np.ndarray, np.ndarray]:
+            rows, start = piece
+            scores = rows @ dense_query
+            scores[~state.alive[start:start + rows.shape[0]]] = -np.inf
+            keep = np.flatnonzero((scores > 0.0) & (scores >= cutoff))
+            winners = keep[top_k_indices(scores[keep], top_n)]
+            return winners + start, scores[winners]
+
+        if len(pieces) == 1:
+            results = [score_shard(pieces[0])]
+        else:
+            results = list(_get_executor().map(score_shard, pieces))
+
+        rows = np.concatenate([r for r, _ in results])
+        scores = np.concatenate([s for _, s in results])
+        winners = top_k_indices(scores, top_n)
+        return rows[winners], scores[winners], state.documents
+
+    def score_batch(
+        self,
+        cleaned_texts: list[str],
+        top_n: int | None,
+        min_score: float | None = None,
+    ) -> tuple[list[tuple[np.ndarray, np.ndarray]], list[IndexedDocument]]:
+        """
+        Score many queries with a single sparse matrix product.
+
+        The queries are vectorized into one matrix Q and multiplied by the
+        document matrix once; the product stays sparse, so memory follows
+        the number of (query, document) pairs sharing a term.
+
+        Args:
+            cleaned_texts: Outputs of clean_text(), one per query
+            top_n: Winners per query, or None for every positive score
+            min_score: Drop scores below this cut-off before selection
+
+        Returns:
+            Tuple of (results, documents), where results[i] is the
+            (rows, scores) pair of query i's winners, highest first
+        """
+        state = self._state
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0))
+        if state.matrix is None or not cleaned_texts:
+            return [empty for _ in cleaned_texts], state.documents
+
+        queries = _transform_many(state, cleaned_texts)
+        product = sparse.hstack(
+            [queries @ state.matrix.T, queries @ state.delta.T], format="csr"
+        )
+        cutoff = min_score if min_score is not None else 0.0
+
+        results = []
+        for i in range(product.shape[0]):
+            start, end = product.indptr[i], product.indptr[i + 1]
+            rows = product.indices[start:end]
+            scores = product.data[start:end]
+            keep = state.alive[rows] & (scores > 0.0) & (scores >= cutoff)
+            rows, scores = rows[keep], scores[keep]
+            winners = top_k_indices(scores, top_n)
+            results.append((rows[winners], scores[winners]))
+
+        return results, state.documents
+
+    def score_approximate(
+        self,
+        cleaned_text: str,
+        top_n: int | None,
+        min_score: float | None = None,
+        candidates: int = 200,
+    ) -> tuple[np.ndarray, np.ndarray, list[IndexedDocument]]:
+        """
+        Approximate nearest neighbours via SimHash, re-scored exactly.
+
+        Every row is summarized by SIMHASH_BITS random-hyperplane sign bits.
+        The query's bits are compared against all rows with a vectorized
+        XOR + popcount, and only the `candidates` rows with the smallest
+        Hamming distance get an exact cosine score. Recall is traded for
+        touching 16 bytes per document instead of its sparse row.
+
+        Args:
+            cleaned_text: Output of clean_text()
+            top_n: Number of winners, or None for every positive score
+            min_score: Drop scores below this cut-off before selection
+            candidates: Rows re-scored exactly
+
+        Returns:
+            Tuple of (rows, scores, documents) for the winners, highest first
+        """
+        state = self._state
+        query = _transform(state, cleaned_text)
+        empty = np.zeros(0, dtype=np.int64)
+
+        if state.simhash is None or query is None:
+            return empty, np.zeros(0), state.documents
+
+        distances = np.bitwise_count(state.simhash ^ _simhash(query, state.hyperplanes)).sum(axis=1)
+        distances[~state.alive] = SIMHASH_BITS + 1
+
+        live = int(state.alive.sum())
+        shortlist = top_k_indices(-distances.astype(np.float64), min(candidates, live))
+
+        scores = _score_rows(state, shortlist, np.asarray(query.todense()).ravel())
+        cutoff = min_score if min_score is not None else 0.0
+        keep = np.flatnonzero((scores > 0.0) & (scores >= cutoff))
+        winners = keep[top_k_indices(scores[keep], top_n)]
+        return shortlist[winners], scores[winners], state.documents
+
+    def score_categories(
+        self,
+        cleaned_text: str,
+        categories: list[str],
+        top_n: int | None,
+        min_score: float | None = None,
+        state: IndexState | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, list[IndexedDocument]]:
+        """
+        Cosine similarity against only the documents of the given categories.
+
+        Each category is a contiguous row range of the fitted matrix (plus
+        any appended rows), so the query is multiplied against zero-copy
+        views of those rows only and the cost follows the size of the
+        requested categories rather than the whole corpus.
+
+        Args:
+            cleaned_text: Output of clean_text()
+            categories: Document categories to search; unknown ones are ignored
+            top_n: Number of winners, or None for every positive score
+            min_score: Drop scores below this cut-off before selection
+            state: Snapshot to score against (default: current)
+
+        Returns:
+            Tuple of (rows, scores, documents) for the winners, highest first
+        """
+        if state is None:
+            state = self._state
+        query = _transform(state, cleaned_text)
+        empty = np.zeros(0, dtype=np.int64)
+
+        parts = [state.categories[c] for c in set(categories) if c in state.categories]
+        if query is None or not parts:
+            return empty, np.zeros(0), state.documents
+
+        dense_query = np.asarray(query.todense()).ravel()
+        base = state.matrix.shape[0]
+        delta_scores = None
+        row_chunks = []
+        score_chunks = []
+        for part in parts:
+            for start, end in part.ranges:
+                row_chunks.append(np.arange(start, end))
+                score_chunks.append(_row_slice(state.matrix, start, end) @ dense_query)
+            if len(part.delta_rows):
+                if delta_scores is None:
+                    delta_scores = state.delta @ dense_query
+                row_chunks.append(part.delta_rows)
+                score_chunks.append(delta_scores[part.delta_rows - base])
+        rows = np.concatenate(row_chunks)
+        scores = np.concatenate(score_chunks)
+
+        cutoff = min_score if min_score is not None else 0.0
+        keep = np.flatnonzero(state.alive[rows] & (scores > 0.0) & (scores >= cutoff))
+        winners = keep[top_k_indices(scores[keep], top_n)]
+        return rows[winners], scores[winners], state.documents
+
+    def first_above(
+        self,
+        cleaned_text: str,
+        threshold: float,
+        block_size: int = 64,
+        categories: list[str] | None = None,
+    ) -> tuple[int, float, list[IndexedDocument]] | None:
+        """
+        Find any document scoring at least threshold, without scoring them all.
+
+        MaxScore pruning: each query term's contribution to any document is
+        bounded by query_weight * term_bounds[term]. Terms are taken in
+        increasing order of bound while the running sum stays below the
+        threshold; a document containing only those "non-essential" terms
+        cannot reach it, so only postings of the remaining terms are
+        walked. Candidates whose essential partial score plus the
+        non-essential bound still falls short are dropped, and the rest are
+        scored exactly in doubling blocks, most promising first, stopping at
+        the first block with a document at or above the threshold.
+
+        Args:
+            cleaned_text: Output of clean_text()
+            threshold: Score the document must reach
+            block_size: Candidates scored exactly in the first step
+            categories: Only consider documents of these categories
+
+        Returns:
+            Tuple of (row, score, documents) for the best document of the
+            first confirming block, or None if no document reaches threshold
+        """
+        state = self._state
+        query = _transform(state, cleaned_text)
+        if state.postings is None or query is None:
+            return None
+
+        terms = query.indices
+        bounds = query.data * state.term_bounds[terms]
+        order = np.argsort(bounds, kind="stable")
+        non_essential = np.searchsorted(np.cumsum(bounds[order]), threshold)
+        if non_essential == len(order):
+            return None  # Even a document with every query term falls short
+        essential = order[non_essential:]
+        slack = float(bounds[order[:non_essential]].sum())
+
+        row_chunks = []
+        weight_chunks = []
+        for i in essential:
+            rows, weights = _posting_list(state, terms[i])
+            row_chunks.append(rows)
+            weight_chunks.append(weights * query.data[i])
+
+        partial = np.bincount(
+            np.concatenate(row_chunks),
+            weights=np.concatenate(weight_chunks),
+            minlength=len(state.alive),
+        )
+        eligible = state.alive
+        if categories:
+            eligible = eligible & _category_mask(state, categories)
+        rows = np.flatnonzero(eligible & (partial + slack >= threshold))
+        partial = partial[rows]
+
+        rows = rows[np.argsort(-partial)]
+        dense_query = np.asarray(query.todense()).ravel()
+        start = 0
+        while start < len(rows):
+            block = rows[start:start + block_size]
+            scores = _score_rows(state, block, dense_query)
+            best = int(np.argmax(scores))
+            if scores[best] >= threshold:
+                return int(block[best]), float(scores[best]), state.documents
+            # Early blocks are the likeliest hits; later ones grow to cut overhead
+            start += block_size
+            block_size *= 2
+        return None
+
+    def score_documents(
+        self,
+        cleaned_text: str,
+        document_ids: list[int],
+    ) -> tuple[np.ndarray, np.ndarray, list[IndexedDocument]]:
+        """
+        Exact cosine similarity against a few given documents.
+
+        Meant for re-scoring a short candidate list from another engine;
+        ids that are not (or no longer) indexed are skipped.
+
+        Args:
+            cleaned_text: Output of clean_text()
+            document_ids: Database ids of the documents to score
+
+        Returns:
+            Tuple of (rows, scores, documents) in the order of document_ids
+        """
+        state = self._state
+        query = _transform(state, cleaned_text)
+        rows = np.array(
+            [state.rows[i] for i in document_ids if i in state.rows], dtype=np.int64
+        )
+
+        if query is None or not len(rows):
+            return np.zeros(0, dtype=np.int64), np.zeros(0), state.documents
+
+        scores = _score_rows(state, rows, np.asarray(query.todense()).ravel())
+        return rows, scores, state.documents
+
+    def score_candidates(
+        self,
+        cleaned_text: str,
+        state: IndexState | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, list[IndexedDocument]]:
+        """
+        Cosine similarity against only the documents sharing a term with the query.
+
+        Walks the posting list of each query term and accumulates
+        query_weight * doc_weight term-at-a-time, so the cost is proportional
+        to the postings touched rather than to the corpus size. Documents
+        not returned have a score of exactly 0.
+
+        Args:
+            cleaned_text: Output of clean_text()
+            state: Snapshot to score against (default: current)
+
+        Returns:
+            Tuple of (rows, scores, documents): matrix row numbers of live
+            candidates, their scores, and the document list they index into.
+        """
+        if state is None:
+            state = self._state
+        query = _transform(state, cleaned_text)
+        empty = np.zeros(0, dtype=np.int64)
+
+        if state.postings is None or query is None:
+            return empty, np.zeros(0), state.documents
+
+        row_chunks = []
+        weight_chunks = []
+        for term, query_weight in zip(query.indices, query.data):
+            rows, weights = _posting_list(state, term)
+            if not len(rows):
+                continue
+            row_chunks.append(rows)
+            weight_chunks.append(weights * query_weight)
+
+        if not row_chunks:
+            return empty, np.zeros(0), state.documents
+
+        # Sum the per-term contributions of each touched document
+        rows, inverse = np.unique(np.concatenate(row_chunks), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weight_chunks))
+
+        live = state.alive[rows]
+        return rows[live], scores[live], state.documents
+
+
+def _fit_state(
+    documents: list[Document],
+    cleaned_texts: list[str] | None = None,
+) -> IndexState:
+    """Fit a fresh state over the documents. See CorpusIndex.fit."""
+    corpus = cleaned_texts
+    if corpus is None:
+        corpus = [clean_text(doc.content) for doc in documents]
+    order = sorted(range(len(documents)), key=lambda i: documents[i].category)
+    indexed = [_to_indexed(documents[i]) for i in order]
+    corpus = [corpus[i] for i in order]
+
+    vectorizer = _new_vectorizer()
+
+    if not corpus:
+        state = IndexState()
+    else:
+        try:
+            matrix = _compact(vectorizer.fit_transform(corpus))
+            delta = _empty_rows(matrix.shape[1])
+            hyperplanes = _hyperplanes(matrix.shape[1])
+            state = IndexState(
+                vectorizer=vectorizer,
+                matrix=matrix,
+                postings=matrix.tocsc(),
+                delta=delta,
+                delta_postings=delta.tocsc(),
+                simhash=_simhash(matrix, hyperplanes),
+                hyperplanes=hyperplanes,
+                term_bounds=_term_bounds(matrix),
+                categories=_partition(indexed, matrix.shape[0]),
+                documents=indexed,
+                alive=np.ones(len(indexed), dtype=bool),
+                rows={doc.document_id: row for row, doc in enumerate(indexed)},
+                fitted_size=len(indexed),
+                fit_id=uuid.uuid4().hex,
+            )
+        except ValueError as e:
+            # Empty vocabulary (no valid tokens)
+            logger.error(f"[INDEX] TF-IDF fit failed: {e}")
+            state = IndexState()
+    return state
+
+
+def _appended(
+    state: IndexState,
+    documents: list[Document],
+    cleaned_texts: list[str] | None = None,
+) -> IndexState:
+    """A fitted state with the documents appended. See CorpusIndex.add_documents."""
+    # Re-adding an id replaces the old row
+    state, _ = _tombstoned(state, [doc.id for doc in documents])
+
+    corpus = cleaned_texts
+    if corpus is None:
+        corpus = [clean_text(doc.content) for doc in documents]
+    new_rows = _compact(state.vectorizer.transform(corpus))
+    start = len(state.documents)
+
+    rows = dict(state.rows)
+    rows.update({doc.id: start + i for i, doc in enumerate(documents)})
+
+    analyzer = state.vectorizer.build_analyzer()
+    vocabulary = state.vectorizer.vocabulary_
+    new_terms = {
+        term for text in corpus for term in analyzer(text)
+        if term not in vocabulary
+    }
+
+    # Only the delta row lists of the new documents' categories change
+    new_indexed = [_to_indexed(doc) for doc in documents]
+    categories = dict(state.categories)
+    for i, doc in enumerate(new_indexed):
+        old = categories.get(doc.category, CategoryPartition([], np.zeros(0, dtype=np.int64)))
+        categories[doc.category] = CategoryPartition(
+            ranges=old.ranges,
+            delta_rows=np.append(old.delta_rows, start + i),
+        )
+
+    # Only the delta is rebuilt; it is folded into the matrix at compaction
+    delta = _int32_indices(sparse.vstack([state.delta, new_rows], format="csr"))
+    return replace(
+        state,
+        delta=delta,
+        delta_postings=delta.tocsc(),
+        simhash=np.concatenate([state.simhash, _simhash(new_rows, state.hyperplanes)]),
+        term_bounds=np.maximum(state.term_bounds, _term_bounds(new_rows)),
+        categories=categories,
+        documents=state.documents + new_indexed,
+        alive=np.concatenate([state.alive, np.ones(len(documents), dtype=bool)]),
+        rows=rows,
+        pending_changes=state.pending_changes + len(documents),
+        appended_terms=state.appended_terms | new_terms,
+    )
+
+
+def _tombstoned(state: IndexState, document_ids: list[int]) -> tuple[IndexState, int]:
+    """A state with the given ids marked dead, and how many rows that hit."""
+    targets = [state.rows[i] for i in document_ids if i in state.rows]
+    if not targets:
+        return state, 0
+
+    alive = state.alive.copy()
+    alive[targets] = False
+    removed = set(document_ids)
+    rows = {k: v for k, v in state.rows.items() if k not in removed}
+    return replace(
+        state,
+        alive=alive,
+        rows=rows,
+        pending_changes=state.pending_changes + len(targets),
+    ), len(targets)
+
+
+def _replay_changes(db: Session, state: IndexState, current: IndexState) -> IndexState:
+    """
+    Apply to a freshly fitted state the changes made while it was fitted.
+
+    Args:
+        db: Database session (appended documents are read back from it)
+        state: The new state
+        current: The live state, which saw every append and delete
+
+    Returns:
+        state with the same live documents as current
+    """
+    gone = [i for i in state.rows if i not in current.rows]
+    state, _ = _tombstoned(state, gone)
+
+    changed = [i for i in current.rows if i not in state.rows]
+    if changed:
+        documents = db.query(Document).filter(Document.id.in_(changed)).all()
+        state = _appended(state, documents, get_cleaned_texts(db, documents))
+
+    logger.info(f"[INDEX] Replayed +{len(changed)} / -{len(gone)} changes made during the fit")
+    return state
+
+
+def top_k_indices(scores: np.ndarray, k: int | None) -> np.ndarray:
+    """
+    Indices of the k highest scores, highest first.
+
+    Uses argpartition so only the k winners are sorted, not the whole array.
+
+    Args:
+        scores: Score array
+        k: Number of winners, or None for all (sorted)
+
+    Returns:
+        Integer index array of length min(k, len(scores))
+    """
+    if k is None or k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    winners = np.argpartition(-scores, k - 1)[:k]
+    return winners[np.argsort(-scores[winners], kind="stable")]
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool for shard scoring, shared by all requests.
+
+    Created once with SIMILARITY_SHARDS workers and never shut down, so
+    concurrent requests can always submit to it; extra shards queue.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.SIMILARITY_SHARDS),
+                thread_name_prefix="shard",
+            )
+        return _executor
+
+
+def _row_slice(matrix: sparse.csr_matrix, start: int, end: int) -> sparse.csr_matrix:
+    """Rows [start, end) of a CSR matrix as a view sharing data and indices."""
+    indptr = matrix.indptr
+    lo, hi = indptr[start], indptr[end]
+    return sparse.csr_matrix(
+        (matrix.data[lo:hi], matrix.indices[lo:hi], indptr[start:end + 1] - lo),
+        shape=(end - start, matrix.shape[1]),
+    )
+
+
+def _posting_list(state: IndexState, term: int) -> tuple[np.ndarray, np.ndarray]:
+    """Rows containing a term and their weights, across the matrix and delta."""
+    postings, delta = state.postings, state.delta_postings
+    start, end = postings.indptr[term], postings.indptr[term + 1]
+    delta_start, delta_end = delta.indptr[term], delta.indptr[term + 1]
+    if delta_start == delta_end:
+        return postings.indices[start:end], postings.data[start:end]
+    return (
+        np.concatenate([
+            postings.indices[start:end],
+            delta.indices[delta_start:delta_end] + state.matrix.shape[0],
+        ]),
+        np.concatenate([postings.data[start:end], delta.data[delta_start:delta_end]]),
+    )
+
+
+def _category_mask(state: IndexState, categories: list[str]) -> np.ndarray:
+    """Boolean mask of the rows belonging to any of the given categories."""
+    mask = np.zeros(len(state.alive), dtype=bool)
+    for category in set(categories):
+        part = state.categories.get(category)
+        if part is None:
+            continue
+        for start, end in part.ranges:
+            mask[start:end] = True
+        mask[part.delta_rows] = True
+    return mask
+
+
+def _score_rows(state: IndexState, rows: np.ndarray, dense_query: np.ndarray) -> np.ndarray:
+    """Scores of the given rows (matrix or delta) against a dense query, in order."""
+    base = state.matrix.shape[0]
+    in_delta = rows >= base
+    scores = np.empty(len(rows), dtype=np.float64)
+    scores[~in_delta] = state.matrix[rows[~in_delta]] @ dense_query
+    scores[in_delta] = state.delta[rows[in_delta] - base] @ dense_query
+    return scores
+
+
+def _hyperplanes(n_features: int) -> np.ndarray:
+    """
+    Random hyperplanes for SimHash signatures of a vocabulary width.
+
+    Drawn once per fit from a fixed seed and kept in the index state (and
+    snapshot), so queries and appended rows reuse them.
+    """
+    rng = np.random.default_rng(SIMHASH_BITS)
+    return rng.standard_normal((n_features, SIMHASH_BITS), dtype=np.float32)
+
+
+def _simhash(matrix: sparse.csr_matrix, hyperplanes: np.ndarray) -> np.ndarray:
+    """Random-hyperplane signatures of each row, packed into uint64 words."""
+    bits = np.asarray(matrix @ hyperplanes) > 0
+    packed = np.packbits(bits, axis=1, bitorder="little")
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def _new_vectorizer() -> TfidfVectorizer:
+    """Create the TF-IDF vectorizer used by the index."""
+    # Raw TF-IDF weights are kept un-normalized so that query vectors can
+    # be normalized including terms the corpus has never seen.
+    return TfidfVectorizer(
+        max_features=5000,  # Limit features for performance
+        ngram_range=(1, 2),  # Use unigrams and bigrams
+        min_df=1,  # Minimum document frequency
+        norm=None,
+    )
+
+
+def _write_snapshot(state: IndexState, path: str) -> None:
+    """Write a state's arrays and manifest into a new directory."""
+    os.makedirs(path)
+
+    vocabulary = state.vectorizer.vocabulary_
+    terms = [""] * len(vocabulary)
+    for term, column in vocabulary.items():
+        terms[column] = term
+
+    arrays = {
+        "idf": state.vectorizer.idf_,
+        "alive": state.alive,
+        "csr_data": state.matrix.data,
+        "csr_indices": state.matrix.indices,
+        "csr_indptr": state.matrix.indptr,
+        "csc_data": state.postings.data,
+        "csc_indices": state.postings.indices,
+        "csc_indptr": state.postings.indptr,
+        "delta_data": state.delta.data,
+        "delta_indices": state.delta.indices,
+        "delta_indptr": state.delta.indptr,
+        "simhash": state.simhash,
+        "hyperplanes": state.hyperplanes,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.asarray(array))
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "shape": list(state.matrix.shape),
+        "terms": terms,
+        "documents": [
+            [doc.document_id, doc.title, doc.category, doc.source]
+            for doc in state.documents
+        ],
+        "fitted_size": state.fitted_size,
+        "fit_id": state.fit_id,
+        "pending_changes": state.pending_changes,
+        "appended_terms": sorted(state.appended_terms),
+    }
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+
+def prune_stale_entries(path: str, prefixes: tuple[str, ...], keep: set[str]) -> None:
+    """
+    Delete old files and directories of a snapshot directory.
+
+    Only entries starting with one of the prefixes and older than
+    SNAPSHOT_GRACE_SECONDS go, so a snapshot another worker is still
+    writing or has only just published survives; the published snapshot
+    is always kept. Workers that memory-mapped a deleted snapshot keep
+    their open pages.
+
+    Args:
+        path: Snapshot directory
+        prefixes: Name prefixes of the entries the caller owns
+        keep: Entry names never to delete
+    """
+    try:
+        with open(os.path.join(path, SNAPSHOT_POINTER), encoding="utf-8") as f:
+            keep = keep | {f.read().strip()}
+        entries = os.listdir(path)
+    except OSError:
+        return
+
+    deadline = time.time() - SNAPSHOT_GRACE_SECONDS
+    for entry in entries:
+        if entry in keep or entry == SNAPSHOT_POINTER or not entry.startswith(prefixes):
+            continue
+        entry_path = os.path.join(path, entry)
+        try:
+            if os.path.getmtime(entry_path) > deadline:
+                continue
+            if os.path.isdir(entry_path):
+                shutil.rmtree(entry_path, ignore_errors=True)
+            else:
+                os.remove(entry_path)
+        except OSError:
+            continue
+
+
+def _read_snapshot(path: str) -> IndexState | None:
+    """Rebuild an index state from a snapshot directory, or None if incompatible."""
+    manifest_path = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        logger.warning(f"[INDEX] Ignoring snapshot with format {manifest.get('format_version')}")
+        return None
+
+    arrays = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        for name in _SNAPSHOT_ARRAYS
+    }
+    shape = tuple(manifest["shape"])
+
+    vectorizer = _new_vectorizer()
+    vectorizer.vocabulary_ = {term: column for column, term in enumerate(manifest["terms"])}
+    vectorizer.idf_ = np.asarray(arrays["idf"])
+
+    documents = [
+        IndexedDocument(document_id=i, title=title, category=category, source=source)
+        for i, title, category, source in manifest["documents"]
+    ]
+    alive = arrays["alive"]
+
+    matrix = sparse.csr_matrix(
+        (arrays["csr_data"], arrays["csr_indices"], arrays["csr_indptr"]),
+        shape=shape,
+    )
+    delta = sparse.csr_matrix(
+        (
+            np.asarray(arrays["delta_data"]),
+            np.asarray(arrays["delta_indices"]),
+            np.asarray(arrays["delta_indptr"]),
+        ),
+        shape=(len(arrays["delta_indptr"]) - 1, shape[1]),
+    )
+
+    state = IndexState(
+        vectorizer=vectorizer,
+        matrix=matrix,
+        postings=sparse.csc_matrix(
+            (arrays["csc_data"], arrays["csc_indices"], arrays["csc_indptr"]),
+            shape=shape,
+        ),
+        delta=delta,
+        delta_postings=delta.tocsc(),
+        term_bounds=np.maximum(_term_bounds(matrix), _term_bounds(delta)),
+        documents=documents,
+        alive=alive,
+        rows={doc.document_id: row for row, doc in enumerate(documents) if alive[row]},
+        fitted_size=manifest["fitted_size"],
+        fit_id=manifest["fit_id"],
+        pending_changes=manifest["pending_changes"],
+        appended_terms=frozenset(manifest["appended_terms"]),
+        simhash=arrays["simhash"],
+        hyperplanes=arrays["hyperplanes"],
+    )
+    return replace(state, categories=_partition(documents, shape[0]))
+
+
+def _compact(matrix: sparse.spmatrix) -> sparse.csr_matrix:
+    """L2-normalize rows and store them as float32 data with int32 indices."""
+    return _int32_indices(normalize(matrix).tocsr().astype(np.float32))
+
+
+def _int32_indices(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    """Store a CSR matrix's indices and indptr as int32, in place."""
+    matrix.indices = matrix.indices.astype(np.int32, copy=False)
+    matrix.indptr = matrix.indptr.astype(np.int32, copy=False)
+    return matrix
+
+
+def _empty_rows(n_features: int) -> sparse.csr_matrix:
+    """A float32 CSR matrix with no rows, to start an empty delta."""
+    return sparse.csr_matrix(
+        (np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int32), np.zeros(1, dtype=np.int32)),
+        shape=(0, n_features),
+    )
+
+
+def _sparse_nbytes(matrix: sparse.spmatrix | None) -> int:
+    """Bytes held by a CSR/CSC matrix's data, indices and indptr arrays."""
+    if matrix is None:
+        return 0
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+
+def _term_bounds(matrix: sparse.csr_matrix) -> np.ndarray:
+    """Maximum weight of every column of a document matrix."""
+    if matrix.shape[0] == 0:
+        return np.zeros(matrix.shape[1])
+    return np.asarray(matrix.max(axis=0).todense(), dtype=np.float64).ravel()
+
+
+def _partition(documents: list[IndexedDocument], base_rows: int) -> dict[str, CategoryPartition]:
+    """
+    Locate the rows of every document category.
+
+    Args:
+        documents: Metadata of every row, fitted rows first
+        base_rows: Number of rows in the fitted matrix (the rest are delta rows)
+    """
+    ranges: dict[str, list[tuple[int, int]]] = {}
+    start = 0
+    for row in range(1, base_rows + 1):
+        if row == base_rows or documents[row].category != documents[start].category:
+            ranges.setdefault(documents[start].category, []).append((start, row))
+            start = row
+
+    delta_rows: dict[str, list[int]] = {}
+    for row in range(base_rows, len(documents)):
+        delta_rows.setdefault(documents[row].category, []).append(row)
+
+    return {
+        category: CategoryPartition(
+            ranges=ranges.get(category, []),
+            delta_rows=np.array(delta_rows.get(category, []), dtype=np.int64),
+        )
+        for category in ranges.keys() | delta_rows.keys()
+    }
+
+
+def _to_indexed(doc: Document) -> IndexedDocument:
+    """Extract the metadata kept in memory for a document row."""
+    return IndexedDocument(
+        document_id=doc.id,
+        title=doc.title,
+        category=doc.category,
+        source=doc.source,
+    )
+
+
+def _transform(state: IndexState, cleaned_text: str) -> sparse.csr_matrix | None:
+    """Vectorize query text against a state's vocabulary. See CorpusIndex.transform."""
+    if state.vectorizer is None or not cleaned_text:
+        return None
+
+    query = _transform_many(state, [cleaned_text])
+    if query.nnz == 0:
+        return None
+    return query
+
+
+def _transform_many(state: IndexState, cleaned_texts: list[str]) -> sparse.csr_matrix:
+    """
+    Vectorize several query texts into one L2-normalized matrix.
+    Rows with no weight at all are left empty.
+    """
+    vectorizer = state.vectorizer
+    queries = vectorizer.transform(cleaned_texts).tocsr()
+    squared = np.asarray(queries.multiply(queries).sum(axis=1)).ravel()
+
+    # A joint fit would only have kept query-only terms if the vocabulary
+    # was not already truncated to max_features. Terms of appended rows are
+    # missing from those rows too, so they are left out on both sides.
+    vocabulary = vectorizer.vocabulary_
+    if len(vocabulary) < vectorizer.max_features:
+        analyzer = vectorizer.build_analyzer()
+        oov_idf = math.log(state.fitted_size + 1) + 1.0
+        for i, text in enumerate(cleaned_texts):
+            oov_counts: dict[str, int] = {}
+            for term in analyzer(text):
+                if term not in vocabulary and term not in state.appended_terms:
+                    oov_counts[term] = oov_counts.get(term, 0) + 1
+            squared[i] += sum((count * oov_idf) ** 2 for count in oov_counts.values())
+
+    norms = np.sqrt(squared)
+    norms[norms == 0.0] = 1.0
+    return sparse.diags(1.0 / norms) @ queries
+
+
+# Process-wide index shared by all requests
+corpus_index = CorpusIndex()
+
+
+def get_corpus_index(db: Session) -> CorpusIndex:
+    """
+    Return the shared corpus index, building it on first use.
+
+    Args:
+        db: Database session used if the index still needs fitting
+
+    Returns:
+        The fitted CorpusIndex
+    """
+    if not corpus_index.is_fitted:
+        corpus_index.build(db)
+    return corpus_index
+
+
+def compact_corpus_index() -> bool:
+    """
+    Refit the shared index if enough changes have accumulated.
+    Intended to run as a background task after ingestion.
+
+    Returns:
+        True if the index was refitted
+    """
+    if not corpus_index.needs_compaction:
+        return False
+
+    db = SessionLocal()
+    try:
+        corpus_index.compact(db)
+        db.commit()
+    finally:
+        db.close()
+
+    if settings.INDEX_SNAPSHOT_DIR:
+        corpus_index.save(settings.INDEX_SNAPSHOT_DIR)
+    return True
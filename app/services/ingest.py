@@ -0,0 +1,233 @@
+"""
+Keeps the in-memory similarity indexes in sync with the documents table.
+"""
+
+import logging
+import threading
+from collections import Counter
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import CorpusVersion, Document
+from app.services.cleaned_text import forget_cleaned_text, get_cleaned_text, prune_cleaned_texts
+from app.services.fuzzy import (
+    corpus_vocabulary,
+    document_words,
+    save_vocabulary,
+    schedule_vocabulary_save,
+)
+from app.services.index import compact_corpus_index, corpus_index
+from app.services.lsa import refresh_lsa_index, schedule_lsa_refresh
+from app.services.minhash import load_signature, minhash_index, store_signature
+from app.services.winnowing import winnowing_index
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Corpus version the in-memory indexes of this process reflect
+_synced_version: int | None = None
+_sync_lock = threading.Lock()
+_compaction_lock = threading.Lock()
+
+
+def corpus_version(db: Session) -> int:
+    """
+    Number of document changes committed by any worker.
+
+    Args:
+        db: Database session
+
+    Returns:
+        The counter from the corpus_version table (0 before any change)
+    """
+    version = db.query(CorpusVersion.version).filter(CorpusVersion.id == 1).scalar()
+    return version or 0
+
+
+def _ensure_corpus_version(db: Session) -> None:
+    """Create the corpus_version row if this is a fresh database."""
+    if db.get(CorpusVersion, 1) is not None:
+        return
+    db.add(CorpusVersion(id=1, version=0))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker created it first
+        db.rollback()
+
+
+def _bump_corpus_version(db: Session) -> None:
+    """Count a document change; runs in the transaction that makes it."""
+    db.query(CorpusVersion).filter(CorpusVersion.id == 1).update(
+        {CorpusVersion.version: CorpusVersion.version + 1},
+        synchronize_session=False,
+    )
+
+
+def build_indexes(db: Session) -> None:
+    """
+    Prepare the similarity indexes on application startup.
+
+    The corpus index and the fuzzy vocabulary are opened from their
+    on-disk copies when they exist and synced with the documents table;
+    otherwise they are built and saved for the next worker (the vocabulary
+    only if the sync changed it). The LSA
+    projection is loaded or fitted in a background thread. The MinHash and
+    winnowing indexes are built on first use.
+
+    Args:
+        db: Database session
+    """
+    global _synced_version
+    prune_cleaned_texts(db)
+    _ensure_corpus_version(db)
+    version = corpus_version(db)
+
+    vocabulary_path = settings.VOCABULARY_PATH
+    if vocabulary_path and corpus_vocabulary.load(vocabulary_path):
+        corpus_vocabulary.sync(db)
+    else:
+        corpus_vocabulary.build(db)
+    save_vocabulary()
+
+    snapshot_dir = settings.INDEX_SNAPSHOT_DIR
+    loaded = bool(snapshot_dir) and corpus_index.load(snapshot_dir)
+    if loaded:
+        corpus_index.sync(db)
+    if not loaded or corpus_index.needs_compaction:
+        corpus_index.build(db)
+        if snapshot_dir:
+            corpus_index.save(snapshot_dir)
+
+    # Keep the texts cleaned by the builds for the next worker
+    db.commit()
+    _synced_version = version
+    schedule_lsa_refresh()
+
+
+def refresh_indexes(db: Session) -> None:
+    """
+    Catch up with documents added or deleted by other workers.
+
+    Every document change bumps the corpus version in the database, so a
+    worker only has to compare one counter per request; when it moved, the
+    indexes this process has built are synced with the documents table
+    (the fuzzy vocabulary is rebuilt if documents were deleted elsewhere).
+    Call it before scoring.
+
+    Args:
+        db: Database session
+    """
+    global _synced_version
+    version = corpus_version(db)
+    if version == _synced_version:
+        return
+
+    with _sync_lock:
+        if version == _synced_version:
+            return
+        if corpus_index.is_fitted:
+            corpus_index.sync(db)
+        if corpus_vocabulary.is_built:
+            corpus_vocabulary.sync(db)
+        minhash_index.sync(db)
+        winnowing_index.sync(db)
+        _synced_version = version
+
+    logger.info(f"[INGEST] Indexes synced to corpus version {version}")
+    if corpus_index.needs_compaction:
+        threading.Thread(target=compact_indexes, name="compaction", daemon=True).start()
+
+
+def compact_indexes() -> None:
+    """
+    Refit the corpus index if enough changes have accumulated, then the
+    LSA projection for the new fit. Intended to run as a background task
+    after ingestion; concurrent calls return immediately while one runs.
+    """
+    if not _compaction_lock.acquire(blocking=False):
+        return
+    try:
+        if compact_corpus_index():
+            refresh_lsa_index()
+    finally:
+        _compaction_lock.release()
+
+
+def prepare_document(document: Document, db: Session) -> str:
+    """
+    Clean a new document once, attach its precomputed fingerprints and
+    bump the corpus version. Call this before the document is committed.
+
+    Args:
+        document: Document about to be stored
+        db: Database session (the cleaned text is cached in it)
+
+    Returns:
+        The cleaned content, for index_document()
+    """
+    cleaned_text = get_cleaned_text(db, document)
+    store_signature(document, cleaned_text)
+    _bump_corpus_version(db)
+    return cleaned_text
+
+
+def index_document(document: Document, cleaned_text: str | None = None) -> None:
+    """
+    Add a stored document to every similarity index.
+
+    Args:
+        document: Committed document (must have an id)
+        cleaned_text: Cleaned content from prepare_document()
+    """
+    corpus_index.add_documents(
+        [document],
+        [cleaned_text] if cleaned_text is not None else None,
+    )
+
+    signature = load_signature(document)
+    if signature is not None:
+        minhash_index.add(document.id, signature)
+
+    winnowing_index.add(document, cleaned_text)
+
+    corpus_vocabulary.add(document.id, document_words(document))
+    schedule_vocabulary_save()
+
+
+def prepare_removal(document: Document, db: Session) -> Counter[str]:
+    """
+    Capture what removing a document from the indexes needs, drop its
+    cached cleaned text and bump the corpus version. Call this before the
+    deletion is committed.
+
+    Args:
+        document: Document about to be deleted
+        db: Database session the deletion is made in
+
+    Returns:
+        The document's vocabulary word counts, for unindex_document()
+    """
+    forget_cleaned_text(db, document)
+    _bump_corpus_version(db)
+    return document_words(document)
+
+
+def unindex_document(document_id: int, words: Counter[str] | None = None) -> None:
+    """
+    Remove a deleted document from every similarity index.
+
+    Args:
+        document_id: ID of the deleted document
+        words: Word counts from prepare_removal(); without them the fuzzy
+            vocabulary keeps the document's words until its next rebuild
+    """
+    corpus_index.remove_documents([document_id])
+    minhash_index.remove(document_id)
+    winnowing_index.remove(document_id)
+
+    if words is not None:
+        corpus_vocabulary.remove(document_id, words)
+        schedule_vocabulary_save()
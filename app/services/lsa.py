@@ -0,0 +1,353 @@
+"""
+LSA dense-vector engine.
+Projects the TF-IDF corpus onto a few hundred latent topics with
+TruncatedSVD and scores queries with one dense matrix-vector product.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.services.index import (
+    CorpusIndex,
+    IndexedDocument,
+    IndexState,
+    corpus_index,
+    get_corpus_index,
+    prune_stale_entries,
+    top_k_indices,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Saved projections live next to the index snapshots as "lsa-<fit_id>"
+LSA_PREFIX = "lsa-"
+
+
+class LsaIndex:
+    """
+    Dense LSA projection of the corpus index.
+
+    The SVD is fitted once per corpus index fit (see fit(), which is slow
+    and runs off the request path) and saved next to the index snapshot,
+    so other workers and restarts load it instead of refitting. Document
+    vectors are L2-normalized float32 arrays aligned with the corpus index
+    rows: the fitted rows (memory-mapped when loaded) plus the rows
+    appended since, which sync() projects with the existing components.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._fit_id: str | None = None
+        # SVD components, shape (n_components, n_features)
+        self._components: np.ndarray | None = None
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._delta_vectors = np.zeros((0, 0), dtype=np.float32)
+        self._source: IndexState | None = None
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether a projection is available for scoring."""
+        return self._components is not None and self._source is not None
+
+    def sync(self, corpus: CorpusIndex) -> bool:
+        """
+        Project rows appended to the corpus index since the fit.
+
+        Args:
+            corpus: The corpus index to project
+
+        Returns:
+            False if the projection belongs to an older fit (or none) and
+            needs refresh_lsa_index()
+        """
+        state = corpus.state
+        with self._lock:
+            if self._fit_id is None or self._fit_id != state.fit_id:
+                return False
+            if self._components is not None:
+                done = len(self._delta_vectors)
+                if done < state.delta.shape[0]:
+                    self._delta_vectors = np.concatenate(
+                        [self._delta_vectors, self._project(state.delta[done:], self._components)]
+                    )
+            self._source = state
+            return True
+
+    def fit(self, corpus: CorpusIndex) -> None:
+        """
+        Fit the SVD on the live rows of the corpus index and project every row.
+
+        Args:
+            corpus: The corpus index to project
+        """
+        state = corpus.state
+        if state.matrix is None:
+            return
+
+        start = time.perf_counter()
+        live_rows = state.stacked()[state.alive]
+        n_components = min(
+            settings.LSA_COMPONENTS,
+            live_rows.shape[0] - 1,
+            live_rows.shape[1] - 1,
+        )
+        components = None
+        vectors = delta_vectors = np.zeros((0, 0), dtype=np.float32)
+        if n_components >= 1:
+            svd = TruncatedSVD(n_components=n_components, random_state=42)
+            svd.fit(live_rows)
+            components = np.ascontiguousarray(svd.components_, dtype=np.float32)
+            vectors = self._project(state.matrix, components)
+            delta_vectors = self._project(state.delta, components)
+
+            logger.info(
+                f"[LSA] Fitted {n_components} components in "
+                f"{time.perf_counter() - start:.1f}s, explained variance "
+                f"{svd.explained_variance_ratio_.sum():.3f}"
+            )
+
+        with self._lock:
+            self._fit_id = state.fit_id
+            self._components = components
+            self._vectors = vectors
+            self._delta_vectors = delta_vectors
+            self._source = state
+
+    def save(self, path: str) -> bool:
+        """
+        Write the components and fitted-row vectors next to the index snapshot.
+
+        Args:
+            path: Snapshot directory (settings.INDEX_SNAPSHOT_DIR)
+
+        Returns:
+            True if the projection was written
+        """
+        with self._lock:
+            fit_id, components, vectors = self._fit_id, self._components, self._vectors
+        if components is None:
+            return False
+
+        name = f"{LSA_PREFIX}{fit_id}"
+        target = os.path.join(path, name)
+        tmp_path = f"{target}.{os.getpid()}-{uuid.uuid4().hex[:12]}.tmp"
+        try:
+            os.makedirs(tmp_path)
+            np.save(os.path.join(tmp_path, "components.npy"), components)
+            np.save(os.path.join(tmp_path, "vectors.npy"), vectors)
+            if os.path.exists(target):
+                # Another worker saved the same fit first
+                shutil.rmtree(tmp_path, ignore_errors=True)
+            else:
+                os.rename(tmp_path, target)
+        except OSError as e:
+            logger.error(f"[LSA] Could not save projection to {path}: {e}")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return False
+
+        prune_stale_entries(path, (LSA_PREFIX,), {name})
+        logger.info(f"[LSA] Saved projection to {target}")
+        return True
+
+    def load(self, path: str, corpus: CorpusIndex) -> bool:
+        """
+        Open the saved projection of the corpus index's current fit.
+
+        Args:
+            path: Snapshot directory (settings.INDEX_SNAPSHOT_DIR)
+            corpus: The corpus index to project
+
+        Returns:
+            True if a projection matching the current fit was loaded
+        """
+        state = corpus.state
+        target = os.path.join(path, f"{LSA_PREFIX}{state.fit_id}")
+        if state.matrix is None or not os.path.isdir(target):
+            return False
+        try:
+            components = np.load(os.path.join(target, "components.npy"), mmap_mode="r")
+            vectors = np.load(os.path.join(target, "vectors.npy"), mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning(f"[LSA] Could not load projection from {target}: {e}")
+            return False
+        if components.shape[1] != state.matrix.shape[1] or len(vectors) != state.matrix.shape[0]:
+            return False
+
+        with self._lock:
+            self._fit_id = state.fit_id
+            self._components = components
+            self._vectors = vectors
+            self._delta_vectors = np.zeros((0, components.shape[0]), dtype=np.float32)
+            self._source = state
+        self.sync(corpus)
+
+        logger.info(f"[LSA] Loaded projection from {target}")
+        return True
+
+    def score(
+        self,
+        corpus: CorpusIndex,
+        cleaned_text: str,
+        top_n: int | None,
+        min_score: float | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, list[IndexedDocument]]:
+        """
+        Score the query against every document in LSA space.
+
+        While a refit is pending the previous projection keeps serving,
+        together with the index snapshot it was synced with.
+
+        Args:
+            corpus: The corpus index (for vocabulary and tombstones)
+            cleaned_text: Output of clean_text()
+            top_n: Number of winners, or None for every positive score
+            min_score: Drop scores below this cut-off before selection
+
+        Returns:
+            Tuple of (rows, scores, documents) for the winners, highest first
+        """
+        with self._lock:
+            components, state = self._components, self._source
+            vectors, delta_vectors = self._vectors, self._delta_vectors
+
+        empty = np.zeros(0, dtype=np.int64)
+        if components is None or state is None:
+            return empty, np.zeros(0), []
+
+        query = corpus.transform(cleaned_text, state)
+        if query is None:
+            return empty, np.zeros(0), state.documents
+
+        projected = self._project(query, components)[0]
+        scores = np.concatenate([vectors @ projected, delta_vectors @ projected])
+        scores[~state.alive[:len(scores)]] = -np.inf
+
+        cutoff = min_score if min_score is not None else 0.0
+        keep = np.flatnonzero((scores > 0.0) & (scores >= cutoff))
+        winners = keep[top_k_indices(scores[keep], top_n)]
+        return winners, scores[winners].astype(np.float64), state.documents
+
+    @staticmethod
+    def _project(rows, components: np.ndarray) -> np.ndarray:
+        """Project TF-IDF rows into LSA space as L2-normalized float32 vectors."""
+        if rows.shape[0] == 0:
+            return np.zeros((0, components.shape[0]), dtype=np.float32)
+        vectors = np.ascontiguousarray(rows @ components.T, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0.0] = 1.0
+        return vectors / norms
+
+
+# Process-wide index shared by all requests
+lsa_index = LsaIndex()
+
+_refresh_lock = threading.Lock()
+
+
+def refresh_lsa_index() -> None:
+    """
+    Make the shared projection match the corpus index's current fit.
+
+    Loads the projection saved by another worker if there is one, otherwise
+    fits it and saves it. Slow; run it at startup, after compaction or in a
+    background thread (see schedule_lsa_refresh()). Concurrent calls return
+    immediately while one is running.
+    """
+    if settings.LSA_COMPONENTS <= 0 or not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        if lsa_index.sync(corpus_index):
+            return
+        snapshot_dir = settings.INDEX_SNAPSHOT_DIR
+        if snapshot_dir and lsa_index.load(snapshot_dir, corpus_index):
+            return
+        lsa_index.fit(corpus_index)
+        if snapshot_dir:
+            lsa_index.save(snapshot_dir)
+    except Exception as e:
+        logger.error(f"[LSA] Refresh failed: {e}")
+    finally:
+        _refresh_lock.release()
+
+
+def schedule_lsa_refresh() -> None:
+    """Run refresh_lsa_index() in a background thread unless one is running."""
+    if settings.LSA_COMPONENTS > 0 and not _refresh_lock.locked():
+        threading.Thread(target=refresh_lsa_index, name="lsa-refresh", daemon=True).start()
+
+
+def get_lsa_index(db: Session) -> LsaIndex:
+    """
+    Return the shared LSA index, synced with the corpus index.
+
+    Never fits on the request path: if the corpus index was refitted since
+    the projection was made, a background refresh is scheduled and the
+    previous projection keeps serving (is_ready stays False until the first
+    projection exists).
+
+    Args:
+        db: Database session used if the corpus index still needs fitting
+
+    Returns:
+        The shared LsaIndex
+    """
+    if not lsa_index.sync(get_corpus_index(db)):
+        schedule_lsa_refresh()
+    return lsa_index
+
+
+def benchmark(
+    corpus: CorpusIndex,
+    queries: list[str],
+    top_n: int = 3,
+) -> dict[str, float]:
+    """
+    Compare the LSA engine against exact sparse scoring.
+
+    Args:
+        corpus: Fitted corpus index
+        queries: Cleaned query texts
+        top_n: Cut-off for recall@k
+
+    Returns:
+        Fit time (s), mean per-query latency (ms) of each engine and the
+        LSA engine's recall@top_n against the sparse results
+    """
+    start = time.perf_counter()
+    if not lsa_index.sync(corpus):
+        lsa_index.fit(corpus)
+    fit_s = time.perf_counter() - start
+
+    sparse_ms = lsa_ms = 0.0
+    hits = expected = 0
+
+    for query in queries:
+        start = time.perf_counter()
+        rows, scores, _ = corpus.score_candidates(query)
+        exact = set(rows[top_k_indices(scores, top_n)].tolist())
+        sparse_ms += (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        approx, _, _ = lsa_index.score(corpus, query, top_n)
+        lsa_ms += (time.perf_counter() - start) * 1000
+
+        hits += len(exact & set(approx.tolist()))
+        expected += len(exact)
+
+    count = max(len(queries), 1)
+    return {
+        "fit_s": fit_s,
+        "sparse_ms": sparse_ms / count,
+        "lsa_ms": lsa_ms / count,
+        "recall": hits / expected if expected else 0.0,
+    }
@@ -0,0 +1,294 @@
+"""
+MinHash + LSH near-duplicate retrieval.
+Finds verbatim and near-verbatim copies without touching the TF-IDF matrix.
+"""
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+
+from app.models import Document, DocumentSignature
+from app.services.cleaned_text import get_cleaned_texts
+from app.services.nlp import clean_text
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Number of hash permutations in a signature
+NUM_PERMUTATIONS = 128
+
+# LSH banding: NUM_BANDS * ROWS_PER_BAND == NUM_PERMUTATIONS.
+# Pairs with Jaccard above roughly (1 / NUM_BANDS) ** (1 / ROWS_PER_BAND) ~ 0.42
+# are likely to share a bucket.
+NUM_BANDS = 32
+ROWS_PER_BAND = 4
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed so signatures stay comparable across processes and restarts
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+@dataclass
+class MinHashMatch:
+    """A candidate document with its estimated Jaccard similarity."""
+
+    document_id: int
+    jaccard: float
+
+
+def shingles(cleaned_text: str) -> set[str]:
+    """
+    Split cleaned text into overlapping word shingles.
+
+    Args:
+        cleaned_text: Output of clean_text()
+
+    Returns:
+        Set of SHINGLE_SIZE-word shingles (the whole text if shorter)
+    """
+    words = cleaned_text.split()
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {
+        " ".join(words[i:i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def compute_signature(cleaned_text: str) -> np.ndarray | None:
+    """
+    Compute the MinHash signature of cleaned text.
+
+    Args:
+        cleaned_text: Output of clean_text()
+
+    Returns:
+        uint32 array of length NUM_PERMUTATIONS, or None for empty text
+    """
+    items = shingles(cleaned_text)
+    if not items:
+        return None
+
+    # Stable 32-bit hashes (Python's hash() is salted per process)
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little")
+            for s in items
+        ),
+        dtype=np.uint64,
+        count=len(items),
+    )
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+class MinHashIndex:
+    """
+    LSH banding index over MinHash signatures.
+
+    Each signature is split into NUM_BANDS bands; documents whose band
+    hashes collide in any band are candidates, and their Jaccard similarity
+    is estimated as the fraction of equal signature slots.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._built = False
+        self._signatures: dict[int, np.ndarray] = {}
+        self._buckets: list[dict[bytes, set[int]]] = [{} for _ in range(NUM_BANDS)]
+
+    @property
+    def is_built(self) -> bool:
+        """Whether build() has run; until then add/remove are no-ops."""
+        return self._built
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def build(self, db: Session) -> None:
+        """
+        Load stored signatures, computing and persisting any that are missing.
+
+        Args:
+            db: Database session
+        """
+        with self._lock:
+            documents = db.query(Document).options(selectinload(Document.signature)).all()
+            signatures = {}
+            for doc in documents:
+                signature = load_signature(doc)
+                if signature is not None:
+                    signatures[doc.id] = signature
+
+            unsigned = [doc for doc in documents if doc.id not in signatures]
+            for doc, cleaned in zip(unsigned, get_cleaned_texts(db, unsigned)):
+                signature = store_signature(doc, cleaned)
+                if signature is not None:
+                    signatures[doc.id] = signature
+            computed = len(unsigned)
+            if computed:
+                db.commit()
+
+            self._signatures = {}
+            self._buckets = [{} for _ in range(NUM_BANDS)]
+            for document_id, signature in signatures.items():
+                self._insert(document_id, signature)
+            self._built = True
+
+        logger.info(
+            f"[MINHASH] Indexed {len(signatures)} signatures ({computed} newly computed)"
+        )
+
+    def sync(self, db: Session) -> None:
+        """
+        Bring a built index up to date with the documents table.
+
+        Stored signatures of documents missing from the index are inserted
+        and indexed documents no longer in the database are removed.
+
+        Args:
+            db: Database session
+        """
+        with self._lock:
+            if not self._built:
+                return
+            stored_ids = {document_id for (document_id,) in db.query(Document.id)}
+            removed = self._signatures.keys() - stored_ids
+            for document_id in removed:
+                self._delete(document_id)
+
+            missing = stored_ids - self._signatures.keys()
+            if missing:
+                documents = (
+                    db.query(Document)
+                    .options(selectinload(Document.signature))
+                    .filter(Document.id.in_(missing))
+                    .all()
+                )
+                for doc in documents:
+                    signature = load_signature(doc)
+                    if signature is not None:
+                        self._delete(doc.id)
+                        self._insert(doc.id, signature)
+
+        logger.info(f"[MINHASH] Synced with database: +{len(missing)} / -{len(removed)}")
+
+    def add(self, document_id: int, signature: np.ndarray) -> None:
+        """Insert or replace a document's signature."""
+        with self._lock:
+            if not self._built:
+                return
+            self._delete(document_id)
+            self._insert(document_id, signature)
+
+    def remove(self, document_id: int) -> None:
+        """Remove a document from the index."""
+        with self._lock:
+            self._delete(document_id)
+
+    def query(self, signature: np.ndarray) -> list[MinHashMatch]:
+        """
+        Find documents likely to be near-duplicates of the signature.
+
+        Args:
+            signature: Query signature from compute_signature()
+
+        Returns:
+            Candidates sorted by estimated Jaccard similarity (highest first)
+        """
+        with self._lock:
+            candidates: set[int] = set()
+            for band, key in enumerate(_band_keys(signature)):
+                candidates |= self._buckets[band].get(key, set())
+            matches = [
+                MinHashMatch(
+                    document_id=document_id,
+                    jaccard=float(np.mean(self._signatures[document_id] == signature)),
+                )
+                for document_id in candidates
+            ]
+
+        matches.sort(key=lambda m: m.jaccard, reverse=True)
+        return matches
+
+    def _insert(self, document_id: int, signature: np.ndarray) -> None:
+        self._signatures[document_id] = signature
+        for band, key in enumerate(_band_keys(signature)):
+            self._buckets[band].setdefault(key, set()).add(document_id)
+
+    def _delete(self, document_id: int) -> None:
+        signature = self._signatures.pop(document_id, None)
+        if signature is None:
+            return
+        for band, key in enumerate(_band_keys(signature)):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(document_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+
+def _band_keys(signature: np.ndarray) -> list[bytes]:
+    """Split a signature into per-band bucket keys."""
+    return [
+        signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+        for band in range(NUM_BANDS)
+    ]
+
+
+def load_signature(document: Document) -> np.ndarray | None:
+    """Read a document's stored MinHash signature, if any."""
+    if document.signature is None or document.signature.minhash is None:
+        return None
+    return np.frombuffer(document.signature.minhash, dtype=np.uint32)
+
+
+def store_signature(document: Document, cleaned_text: str | None = None) -> np.ndarray | None:
+    """
+    Compute a document's MinHash signature and attach it to the row.
+    The caller is responsible for committing the session.
+
+    Args:
+        document: Document to fingerprint
+        cleaned_text: Cleaned content (cleaned here if omitted)
+
+    Returns:
+        The computed signature, or None if the content cleans to nothing
+    """
+    if cleaned_text is None:
+        cleaned_text = clean_text(document.content)
+    signature = compute_signature(cleaned_text)
+    if document.signature is None:
+        document.signature = DocumentSignature()
+    document.signature.minhash = signature.tobytes() if signature is not None else None
+    return signature
+
+
+# Process-wide index shared by all requests
+minhash_index = MinHashIndex()
+
+
+def get_minhash_index(db: Session) -> MinHashIndex:
+    """
+    Return the shared MinHash index, building it on first use.
+
+    Args:
+        db: Database session used if the index still needs building
+
+    Returns:
+        The built MinHashIndex
+    """
+    if not minhash_index.is_built:
+        minhash_index.build(db)
+    return minhash_index
@@ -12,6 +12,9 @@ from nltk.tokenize import word_tokenize
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Bump whenever clean_text() output changes, so cached cleaned texts are redone
+CLEANING_PIPELINE_VERSION = 1
+
 
 # Cache stopwords for performance
 try:
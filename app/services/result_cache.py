@@ -0,0 +1,95 @@
+"""
+Bounded in-memory cache for analysis results.
+Serves resubmissions of the same OCR'd page without re-running fuzzy
+correction and scoring.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def text_key(text: str) -> str:
+    """
+    Hash raw submission text after the normalization fuzzy correction applies.
+
+    Case and whitespace differences between re-scans map to the same key.
+
+    Args:
+        text: Raw submitted text
+
+    Returns:
+        Hex SHA-256 digest of the normalized text
+    """
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a fixed TTL.
+
+    Callers put the corpus generation into their keys, so entries computed
+    before the documents changed are simply never looked up again and age
+    out of the LRU order.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Look up a live entry, marking it most recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entries beyond max_size.
+
+        Args:
+            key: Cache key
+            value: Value to cache (treated as immutable by callers)
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
@@ -4,20 +4,44 @@ Core plagiarism detection logic.
 """
 
 import logging
+import re
+from collections import deque
+from collections.abc import Iterator
 from dataclasses import dataclass
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.models import Document
+from app.services.alignment import MatchedSpan, find_matched_spans
 from app.services.nlp import clean_text
-from app.services.fuzzy import correct_text
+from app.services.fuzzy import Vocabulary, correct_text, get_vocabulary
+from app.services.index import (
+    CorpusIndex,
+    IndexedDocument,
+    corpus_index,
+    get_corpus_index,
+    top_k_indices,
+)
+from app.services.lsa import get_lsa_index
+from app.services.minhash import compute_signature, get_minhash_index
+from app.services.result_cache import ResultCache, text_key
+from app.services.winnowing import get_winnowing_index
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Available retrieval engines for find_top_matches
+ENGINE_TFIDF = "tfidf"
+ENGINE_MINHASH = "minhash"
+ENGINE_SIMHASH = "simhash"
+ENGINE_LSA = "lsa"
+
+# Cleaned inputs and match lists of recent submissions; keys include the
+# corpus generation, so entries never outlive a change to the documents
+result_cache = ResultCache(settings.RESULT_CACHE_SIZE, settings.RESULT_CACHE_TTL)
+
 
 @dataclass
 class MatchResult:
@@ -28,6 +52,8 @@ class MatchResult:
     category: str
     source: str | None
     similarity_score: float
+    # Fraction of windows matching the document (long-document mode only)
+    coverage: float | None = None
 
     def to_dict(self) -> dict:
         """Convert to dictionary for API response."""
@@ -37,34 +63,50 @@ class MatchResult:
             "category": self.category,
             "source": self.source,
             "score": round(self.similarity_score, 4),
+            "coverage": round(self.coverage, 4) if self.coverage is not None else None,
         }
 
 
-def find_top_matches(
+@dataclass
+class PassageMatchResult:
+    """Represents a reference document sharing copied passages with the input."""
+
+    document_id: int
+    title: str
+    shared_fingerprints: int
+    coverage: float
+
+
+def prepare_input(
     input_text: str,
     db: Session,
-    top_n: int | None = None,
-) -> list[MatchResult]:
+    vocabulary: Vocabulary | None = None,
+    cache: bool = True,
+) -> str:
     """
-    Find the top N most similar documents to the input text.
+    Apply OCR fuzzy correction and NLP cleaning to raw input text.
 
-    Uses TF-IDF vectorization and cosine similarity to compare
-    the input against all documents in the repository.
+    Results are cached per normalized text and corpus generation.
 
     Args:
         input_text: The raw text to check for plagiarism
         db: Database session
-        top_n: Number of top matches to return (default from settings)
+        vocabulary: Fuzzy vocabulary (the shared one if omitted)
+        cache: Use the result cache (off for fragments such as windows,
+            which would only push out whole submissions)
 
     Returns:
-        List of MatchResult objects sorted by similarity (highest first)
+        Cleaned text ready for the similarity indexes
     """
-    if top_n is None:
-        top_n = settings.TOP_MATCHES_COUNT
+    cache_key = ("input", text_key(input_text), corpus_index.generation)
+    cached = result_cache.get(cache_key) if cache else None
+    if cached is not None:
+        logger.info("[SIMILARITY] Serving cleaned input from result cache")
+        return cached
 
     # === Step 1: Fuzzy correction for OCR errors ===
     logger.info("[SIMILARITY] Applying fuzzy correction for OCR errors...")
-    corrected_input = correct_text(input_text, db)
+    corrected_input = correct_text(input_text, db, vocabulary)
 
     # === Step 2: Clean the corrected text ===
     cleaned_input = clean_text(corrected_input)
@@ -75,58 +117,485 @@ def find_top_matches(
     logger.info(f"[SIMILARITY] Cleaned input length: {len(cleaned_input)} chars")
     logger.info(f"[SIMILARITY] Cleaned input preview: {cleaned_input[:150]!r}")
 
+    if cache:
+        result_cache.put(cache_key, cleaned_input)
+    return cleaned_input
+
+
+def find_top_matches(
+    input_text: str,
+    db: Session,
+    top_n: int | None = None,
+    engine: str = ENGINE_TFIDF,
+    prepared_input: str | None = None,
+    min_score: float | None = None,
+    categories: list[str] | None = None,
+) -> list[MatchResult]:
+    """
+    Find the top N most similar documents to the input text.
+
+    Uses TF-IDF vectorization and cosine similarity to compare the input
+    against the shared corpus index. Documents sharing no term with the
+    input have a score of 0 and are not returned.
+
+    With engine="minhash", near-duplicates are looked up in the MinHash LSH
+    index first and only those candidates are scored, with the same exact
+    TF-IDF cosine as the other engines so the verdict thresholds apply; the
+    whole index is only scored when LSH finds no candidate.
+
+    With engine="simhash", documents are shortlisted by Hamming distance
+    between random-hyperplane signatures and only the shortlist is scored
+    exactly; faster on very large corpora at a small loss of recall.
+
+    With engine="lsa", documents are scored in a dense latent-topic space
+    (TruncatedSVD of the TF-IDF matrix), which also matches paraphrases
+    that share few exact terms with the source. The projection is fitted
+    in the background; until it exists TF-IDF scoring is used instead.
+
+    When categories are given, only documents of those categories are
+    searched: MinHash candidates are filtered by category, and every other
+    engine scores the input exactly against the categories' sub-matrices.
+
+    Results are cached per normalized input text, engine, cut-offs and
+    corpus generation, so resubmissions skip correction and scoring.
+
+    Args:
+        input_text: The raw text to check for plagiarism
+        db: Database session
+        top_n: Number of top matches to return (default from settings)
+        engine: Retrieval engine, "tfidf", "minhash", "simhash" or "lsa"
+        prepared_input: Output of prepare_input() for input_text, if the
+            caller already has it
+        min_score: Only return matches scoring at least this much. If given
+            without top_n, every match above the cut-off is returned.
+        categories: Restrict the search to these document categories
+
+    Returns:
+        List of MatchResult objects sorted by similarity (highest first)
+    """
+    if top_n is None and min_score is None:
+        top_n = settings.TOP_MATCHES_COUNT
+
+    # Score against the pre-fitted corpus index
+    index = get_corpus_index(db)
+    scope = tuple(sorted(set(categories))) if categories else None
+    cache_key = (
+        "matches", text_key(input_text), index.generation, engine, top_n, min_score, scope,
+    )
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        logger.info("[SIMILARITY] Serving matches from result cache")
+        return list(cached)
+
+    matches = _find_top_matches(
+        input_text, db, index, top_n, engine, prepared_input, min_score, scope
+    )
+    result_cache.put(cache_key, tuple(matches))
+    return matches
+
+
+def _find_top_matches(
+    input_text: str,
+    db: Session,
+    index: CorpusIndex,
+    top_n: int | None,
+    engine: str,
+    prepared_input: str | None,
+    min_score: float | None,
+    categories: tuple[str, ...] | None,
+) -> list[MatchResult]:
+    """Uncached body of find_top_matches()."""
+    if prepared_input is None:
+        prepared_input = prepare_input(input_text, db)
+    cleaned_input = prepared_input
+
     if not cleaned_input:
         logger.warning("[SIMILARITY] Cleaned input is empty! Returning no matches.")
         return []
 
-    # Fetch all reference documents from the database
-    documents = db.query(Document).all()
-    logger.info(f"[SIMILARITY] Found {len(documents)} documents in database")
+    logger.info(f"[SIMILARITY] Corpus index holds {len(index)} documents")
 
-    if not documents:
-        logger.warning("[SIMILARITY] No documents in database! Returning no matches.")
+    if len(index) == 0:
+        logger.warning("[SIMILARITY] No documents in index! Returning no matches.")
         return []
 
-    # Prepare corpus: input text + all document contents
-    corpus = [cleaned_input] + [clean_text(doc.content) for doc in documents]
+    if engine == ENGINE_MINHASH:
+        matches = _find_minhash_matches(
+            cleaned_input, db, index, top_n, min_score, categories
+        )
+        if matches:
+            return matches
+        logger.info("[SIMILARITY] No LSH candidates, falling back to TF-IDF")
+
+    lsa = get_lsa_index(db) if engine == ENGINE_LSA else None
+    if lsa is not None and not lsa.is_ready:
+        logger.info("[SIMILARITY] LSA projection not fitted yet, falling back to TF-IDF")
+
+    if categories:
+        # Scoped query: multiply against the requested categories' rows only
+        rows, similarities, documents = index.score_categories(
+            cleaned_input, list(categories), top_n, min_score
+        )
+        logger.info(f"[SIMILARITY] Scored categories {list(categories)}")
+    elif engine == ENGINE_SIMHASH:
+        rows, similarities, documents = index.score_approximate(
+            cleaned_input, top_n, min_score, settings.SIMHASH_CANDIDATES
+        )
+        logger.info(f"[SIMILARITY] SimHash shortlist of {settings.SIMHASH_CANDIDATES} re-scored")
+    elif lsa is not None and lsa.is_ready:
+        rows, similarities, documents = lsa.score(
+            index, cleaned_input, top_n, min_score
+        )
+        logger.info(f"[SIMILARITY] Scored {len(index)} documents in LSA space")
+    elif settings.SIMILARITY_SHARDS > 1 and len(index) >= settings.SHARD_MIN_DOCUMENTS:
+        # Large corpus: score row shards in parallel, merge per-shard top-k
+        rows, similarities, documents = index.score_sharded(
+            cleaned_input, top_n, min_score, settings.SIMILARITY_SHARDS
+        )
+        logger.info(f"[SIMILARITY] Scored {settings.SIMILARITY_SHARDS} shards in parallel")
+    else:
+        # Only documents sharing at least one term with the input are scored
+        rows, similarities, documents = index.score_candidates(cleaned_input)
+        logger.info(f"[SIMILARITY] Scored {len(rows)} candidate documents")
+
+        if min_score is not None:
+            keep = similarities >= min_score
+            rows, similarities = rows[keep], similarities[keep]
+
+        # Select the winners on the raw score array; only they become MatchResults
+        winners = top_k_indices(similarities, top_n)
+        rows, similarities = rows[winners], similarities[winners]
 
-    # Create TF-IDF vectors
-    vectorizer = TfidfVectorizer(
-        max_features=5000,  # Limit features for performance
-        ngram_range=(1, 2),  # Use unigrams and bigrams
-        min_df=1,  # Minimum document frequency
+    return [
+        _to_match_result(documents[row], float(score))
+        for row, score in zip(rows, similarities)
+    ]
+
+
+def prepare_inputs(input_texts: list[str], db: Session) -> list[str]:
+    """
+    Run prepare_input() over many texts.
+
+    Fuzzy correction and NLP cleaning are pure Python and hold the GIL, so
+    the texts are processed one after another; a thread pool would only
+    add overhead. The fuzzy vocabulary is fetched once, and its correction
+    memo means a misread shared by several texts is corrected only once.
+
+    Args:
+        input_texts: Raw texts to check for plagiarism
+        db: Database session
+
+    Returns:
+        Cleaned texts, in input order
+    """
+    vocabulary = get_vocabulary(db)
+    return [prepare_input(text, db, vocabulary) for text in input_texts]
+
+
+def iter_windows(text: str, window_words: int, overlap: int) -> Iterator[str]:
+    """
+    Stream overlapping word windows of a text.
+
+    Words are read lazily from the text, so at most one window of words is
+    held at a time.
+
+    Args:
+        text: Raw text
+        window_words: Words per window
+        overlap: Words shared by consecutive windows (less than window_words)
+
+    Yields:
+        Each window as a space-joined string; a text shorter than one window
+        yields a single window
+    """
+    step = max(1, window_words - overlap)
+    window: deque[str] = deque(maxlen=window_words)
+    pending = 0
+    for match in re.finditer(r"\S+", text):
+        window.append(match.group())
+        pending += 1
+        if len(window) == window_words and pending >= step:
+            yield " ".join(window)
+            pending = 0
+    if pending and (pending < step or len(window) < window_words):
+        yield " ".join(window)
+
+
+def find_top_matches_windowed(
+    input_text: str,
+    db: Session,
+    top_n: int | None = None,
+    categories: list[str] | None = None,
+    window_words: int | None = None,
+    overlap: int | None = None,
+) -> list[MatchResult]:
+    """
+    Find the top N matches of a long submission, window by window.
+
+    The submission is split into overlapping windows of about a page, and
+    each window is corrected, cleaned and scored against the TF-IDF index
+    on its own. A document's score is its best window score, so copying
+    one section of a long report is not diluted by the rest; its coverage
+    is the fraction of windows scoring at least
+    PLAGIARISM_THRESHOLD_MODERATE against it. Every window is scored
+    against the same index snapshot, so a concurrent compaction cannot mix
+    row numbers of two fits. Memory follows the window size, not the
+    submission size.
+
+    Args:
+        input_text: The raw text to check for plagiarism
+        db: Database session
+        top_n: Number of top matches to return (default from settings)
+        categories: Restrict the search to these document categories
+        window_words: Words per window (default from settings)
+        overlap: Words shared by consecutive windows (default from settings)
+
+    Returns:
+        List of MatchResult objects with coverage, sorted by score (highest first)
+    """
+    if top_n is None:
+        top_n = settings.TOP_MATCHES_COUNT
+    if window_words is None:
+        window_words = settings.WINDOW_WORDS
+    if overlap is None:
+        overlap = settings.WINDOW_OVERLAP
+
+    index = get_corpus_index(db)
+    scope = tuple(sorted(set(categories))) if categories else None
+    cache_key = (
+        "windows", text_key(input_text), index.generation, top_n, scope, window_words, overlap,
     )
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        logger.info("[SIMILARITY] Serving windowed matches from result cache")
+        return list(cached)
+
+    vocabulary = get_vocabulary(db)
+    state = index.state
+    documents: list[IndexedDocument] = state.documents
+    best: dict[int, float] = {}
+    hits: dict[int, int] = {}
+    windows = 0
+
+    for window in iter_windows(input_text, window_words, overlap):
+        windows += 1
+        cleaned = prepare_input(window, db, vocabulary, cache=False)
+        if not cleaned:
+            continue
+        if scope:
+            rows, scores, _ = index.score_categories(cleaned, list(scope), None, state=state)
+        else:
+            rows, scores, _ = index.score_candidates(cleaned, state)
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            if score > best.get(row, 0.0):
+                best[row] = score
+            if score >= settings.PLAGIARISM_THRESHOLD_MODERATE:
+                hits[row] = hits.get(row, 0) + 1
+
+    logger.info(f"[SIMILARITY] Scored {windows} windows, {len(best)} documents touched")
+
+    rows = list(best)
+    winners = top_k_indices(np.array([best[row] for row in rows]), top_n)
+    matches = []
+    for i in winners:
+        row = rows[i]
+        match = _to_match_result(documents[row], best[row])
+        match.coverage = hits.get(row, 0) / max(windows, 1)
+        matches.append(match)
+
+    result_cache.put(cache_key, tuple(matches))
+    return matches
+
+
+def find_verdict(
+    input_text: str,
+    db: Session,
+    prepared_input: str | None = None,
+    categories: list[str] | None = None,
+) -> tuple[str, MatchResult | None]:
+    """
+    Decide the verdict without ranking the whole corpus.
+
+    Looks for any document at or above PLAGIARISM_THRESHOLD_HIGH, then
+    PLAGIARISM_THRESHOLD_MODERATE, using MaxScore pruning on the inverted
+    index and stopping at the first confirming document. The returned match
+    proves the verdict but is not necessarily the best match.
+
+    Args:
+        input_text: The raw text to check for plagiarism
+        db: Database session
+        prepared_input: Output of prepare_input() for input_text, if the
+            caller already has it
+        categories: Only consider documents of these categories
+
+    Returns:
+        Tuple of (decision, confirming match or None for original content)
+    """
+    if prepared_input is None:
+        prepared_input = prepare_input(input_text, db)
+
+    index = get_corpus_index(db)
+    for threshold in (settings.PLAGIARISM_THRESHOLD_HIGH, settings.PLAGIARISM_THRESHOLD_MODERATE):
+        found = index.first_above(prepared_input, threshold, categories=categories)
+        if found is not None:
+            row, score, documents = found
+            logger.info(f"[SIMILARITY] Verdict confirmed at threshold {threshold}")
+            return get_decision(score), _to_match_result(documents[row], score)
+
+    return get_decision(0.0), None
+
+
+def find_top_matches_batch(
+    prepared_inputs: list[str],
+    db: Session,
+    top_n: int | None = None,
+    min_score: float | None = None,
+) -> list[list[MatchResult]]:
+    """
+    Find the top N TF-IDF matches for many inputs with one sparse product.
+
+    Args:
+        prepared_inputs: Outputs of prepare_input()/prepare_inputs()
+        db: Database session
+        top_n: Number of top matches per input (default from settings)
+        min_score: Only return matches scoring at least this much
 
-    try:
-        tfidf_matrix = vectorizer.fit_transform(corpus)
-        logger.info(f"[SIMILARITY] TF-IDF matrix shape: {tfidf_matrix.shape}")
-    except ValueError as e:
-        # Empty vocabulary (no valid tokens)
-        logger.error(f"[SIMILARITY] TF-IDF failed: {e}")
+    Returns:
+        One MatchResult list per input, each sorted highest first
+    """
+    if top_n is None and min_score is None:
+        top_n = settings.TOP_MATCHES_COUNT
+
+    index = get_corpus_index(db)
+    results, documents = index.score_batch(prepared_inputs, top_n, min_score)
+    logger.info(f"[SIMILARITY] Batch-scored {len(prepared_inputs)} inputs")
+
+    return [
+        [_to_match_result(documents[row], float(score)) for row, score in zip(rows, scores)]
+        for rows, scores in results
+    ]
+
+
+def _find_minhash_matches(
+    cleaned_input: str,
+    db: Session,
+    index: CorpusIndex,
+    top_n: int | None,
+    min_score: float | None,
+    categories: tuple[str, ...] | None = None,
+) -> list[MatchResult]:
+    """
+    Near-duplicate lookup through the MinHash LSH index.
+
+    The Jaccard estimate only shortlists documents: it runs lower than the
+    cosine the PLAGIARISM_THRESHOLD_* bands are calibrated for, so the
+    candidates are re-scored with exact TF-IDF cosine.
+    """
+    signature = compute_signature(cleaned_input)
+    if signature is None:
         return []
 
-    # Calculate cosine similarity between input (index 0) and all documents
-    input_vector = tfidf_matrix[0:1]  # Keep as sparse matrix
-    document_vectors = tfidf_matrix[1:]  # All reference documents
+    candidates = get_minhash_index(db).query(signature)
+    logger.info(f"[SIMILARITY] MinHash LSH returned {len(candidates)} candidates")
+
+    document_ids = []
+    for candidate in candidates:
+        doc = index.get(candidate.document_id)
+        if doc is None or (categories and doc.category not in categories):
+            continue
+        document_ids.append(candidate.document_id)
+
+    rows, scores, documents = index.score_documents(cleaned_input, document_ids)
+    cutoff = min_score if min_score is not None else 0.0
+    keep = np.flatnonzero((scores > 0.0) & (scores >= cutoff))
+    winners = keep[top_k_indices(scores[keep], top_n)]
+
+    return [
+        _to_match_result(documents[row], float(score))
+        for row, score in zip(rows[winners], scores[winners])
+    ]
+
+
+def _to_match_result(doc: IndexedDocument, score: float) -> MatchResult:
+    """Build a MatchResult from indexed document metadata."""
+    return MatchResult(
+        document_id=doc.document_id,
+        title=doc.title,
+        category=doc.category,
+        source=doc.source,
+        similarity_score=score,
+    )
+
+
+def find_passage_matches(
+    cleaned_input: str,
+    db: Session,
+    top_n: int | None = None,
+) -> list[PassageMatchResult]:
+    """
+    Find reference documents sharing copied passages with the input.
+
+    Unlike the whole-document score, this is not diluted when only one
+    paragraph of a long submission is copied.
 
-    similarities = cosine_similarity(input_vector, document_vectors).flatten()
+    Args:
+        cleaned_input: Output of prepare_input()
+        db: Database session
+        top_n: Number of documents to return (default from settings)
+
+    Returns:
+        PassageMatchResult list sorted by shared fingerprints (highest first)
+    """
+    if top_n is None:
+        top_n = settings.TOP_MATCHES_COUNT
 
-    # Create match results with similarity scores
+    index = get_corpus_index(db)
     matches = []
-    for idx, doc in enumerate(documents):
+    for candidate in get_winnowing_index(db).query(cleaned_input):
+        doc = index.get(candidate.document_id)
+        if doc is None:
+            continue
         matches.append(
-            MatchResult(
-                document_id=doc.id,
+            PassageMatchResult(
+                document_id=doc.document_id,
                 title=doc.title,
-                category=doc.category,
-                source=doc.source,
-                similarity_score=float(similarities[idx]),
+                shared_fingerprints=candidate.shared_fingerprints,
+                coverage=candidate.coverage,
             )
         )
+        if len(matches) == top_n:
+            break
+
+    logger.info(f"[SIMILARITY] {len(matches)} documents share fingerprinted passages")
+    return matches
 
-    # Sort by similarity (highest first) and return top N
-    matches.sort(key=lambda x: x.similarity_score, reverse=True)
-    return matches[:top_n]
+
+def locate_matched_spans(
+    input_text: str,
+    document_ids: list[int],
+    db: Session,
+) -> dict[int, list[MatchedSpan]]:
+    """
+    Locate copied passages between the input and each given document.
+
+    Only the listed documents (normally the top matches) are aligned, so
+    the cost does not depend on the corpus size.
+
+    Args:
+        input_text: The raw submitted text
+        document_ids: IDs of the documents to align against
+        db: Database session
+
+    Returns:
+        Mapping of document ID to its matched spans
+    """
+    spans = {}
+    for document_id in document_ids:
+        document = db.get(Document, document_id)
+        if document is None:
+            continue
+        spans[document_id] = find_matched_spans(input_text, document.content)
+    return spans
 
 
 def get_decision(highest_score: float) -> str:
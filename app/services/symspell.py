@@ -0,0 +1,136 @@
+"""
+Symmetric-delete spelling candidate index (SymSpell).
+Turns fuzzy correction of a word into a handful of dictionary lookups.
+"""
+
+import logging
+from collections.abc import Callable, Iterable
+
+from rapidfuzz import fuzz
+from rapidfuzz.distance import Levenshtein
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Largest edit distance a correction may span
+MAX_EDIT_DISTANCE = 2
+
+# Deletes are generated from this many leading characters only, which bounds
+# the index size for long words; candidates are verified on the full word
+PREFIX_LENGTH = 7
+
+
+def deletes(word: str, max_distance: int = MAX_EDIT_DISTANCE) -> set[str]:
+    """
+    Every string obtainable by deleting up to max_distance characters.
+
+    Args:
+        word: Source string
+        max_distance: Maximum number of deletions
+
+    Returns:
+        Set of delete variants, including the word itself
+    """
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {
+            variant[:i] + variant[i + 1:]
+            for variant in frontier
+            for i in range(len(variant))
+        }
+        variants |= frontier
+    return variants
+
+
+class SymSpellIndex:
+    """
+    Map from delete variants to the vocabulary words producing them.
+
+    Two words within edit distance d share a variant obtained with at most
+    d deletions from each, so a lookup only needs the variants of the query
+    word. Posting tuples are replaced rather than mutated, so lookups are
+    safe while words are being added or removed.
+    """
+
+    def __init__(
+        self,
+        max_distance: int = MAX_EDIT_DISTANCE,
+        prefix_length: int = PREFIX_LENGTH,
+    ) -> None:
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._deletes: dict[str, tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._deletes)
+
+    def build(self, words: Iterable[str]) -> None:
+        """
+        Index a whole vocabulary from scratch.
+
+        Args:
+            words: Vocabulary words
+        """
+        postings: dict[str, list[str]] = {}
+        count = 0
+        for word in words:
+            count += 1
+            for variant in deletes(word[:self.prefix_length], self.max_distance):
+                postings.setdefault(variant, []).append(word)
+        self._deletes = {variant: tuple(ws) for variant, ws in postings.items()}
+
+        logger.info(f"[SYMSPELL] Indexed {count} words under {len(self._deletes)} deletes")
+
+    def add_words(self, words: Iterable[str]) -> None:
+        """Index new vocabulary words."""
+        for word in words:
+            for variant in deletes(word[:self.prefix_length], self.max_distance):
+                self._deletes[variant] = self._deletes.get(variant, ()) + (word,)
+
+    def remove_words(self, words: Iterable[str]) -> None:
+        """Drop words that left the vocabulary."""
+        for word in words:
+            for variant in deletes(word[:self.prefix_length], self.max_distance):
+                remaining = tuple(w for w in self._deletes.get(variant, ()) if w != word)
+                if remaining:
+                    self._deletes[variant] = remaining
+                else:
+                    self._deletes.pop(variant, None)
+
+    def lookup(
+        self,
+        word: str,
+        frequency: Callable[[str], int],
+        min_ratio: float = 0.0,
+    ) -> str | None:
+        """
+        Closest vocabulary word within max_distance edits.
+
+        Args:
+            word: Possibly misspelled word
+            frequency: Corpus frequency of a vocabulary word, for tie-breaks
+            min_ratio: Minimum fuzz.ratio a candidate must also reach
+
+        Returns:
+            The candidate with the smallest edit distance (most frequent on
+            ties), or None if there is none
+        """
+        candidates: set[str] = set()
+        for variant in deletes(word[:self.prefix_length], self.max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+
+        best = None
+        best_key = None
+        for candidate in candidates:
+            if abs(len(candidate) - len(word)) > self.max_distance:
+                continue
+            distance = Levenshtein.distance(word, candidate, score_cutoff=self.max_distance)
+            if distance > self.max_distance:
+                continue
+            if min_ratio and fuzz.ratio(word, candidate) < min_ratio:
+                continue
+            key = (distance, -frequency(candidate), candidate)
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
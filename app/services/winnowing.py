@@ -0,0 +1,224 @@
+"""
+Winnowing fingerprint index for passage-level copy detection.
+MOSS-style document fingerprinting over character k-gram hashes.
+"""
+
+import logging
+import threading
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy.orm import Session
+
+from app.models import Document
+from app.services.cleaned_text import get_cleaned_texts
+from app.services.nlp import clean_text
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Characters per k-gram (noise threshold: shorter matches are ignored)
+K_GRAM_SIZE = 20
+
+# Winnowing window; any shared run of at least K_GRAM_SIZE + WINDOW_SIZE - 1
+# characters is guaranteed to produce a shared fingerprint
+WINDOW_SIZE = 8
+
+
+@dataclass
+class PassageMatch:
+    """A reference document sharing fingerprinted passages with the query."""
+
+    document_id: int
+    shared_fingerprints: int
+    coverage: float  # Fraction of the query's fingerprints found in the document
+
+
+def fingerprint(cleaned_text: str) -> np.ndarray:
+    """
+    Compute the winnowed fingerprint set of cleaned text.
+
+    Spaces are removed before k-grams are taken, so matches do not depend
+    on how OCR split or joined words.
+
+    Args:
+        cleaned_text: Output of clean_text()
+
+    Returns:
+        Sorted array of unique uint32 fingerprint hashes
+    """
+    text = cleaned_text.replace(" ", "").encode()
+    if len(text) < K_GRAM_SIZE:
+        return np.zeros(0, dtype=np.uint32)
+
+    hashes = np.fromiter(
+        (
+            zlib.crc32(text[i:i + K_GRAM_SIZE])
+            for i in range(len(text) - K_GRAM_SIZE + 1)
+        ),
+        dtype=np.uint32,
+        count=len(text) - K_GRAM_SIZE + 1,
+    )
+    if len(hashes) <= WINDOW_SIZE:
+        return np.unique(hashes.min(keepdims=True))
+
+    # Pick the rightmost minimum of every window
+    windows = sliding_window_view(hashes, WINDOW_SIZE)
+    offsets = WINDOW_SIZE - 1 - np.argmin(windows[:, ::-1], axis=1)
+    positions = np.unique(np.arange(len(windows)) + offsets)
+    return np.unique(hashes[positions])
+
+
+class WinnowingIndex:
+    """
+    Hash table from fingerprint to the documents containing it.
+
+    A query costs one dictionary lookup per query fingerprint, independent
+    of the number of indexed documents.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._built = False
+        self._postings: dict[int, set[int]] = {}
+        self._fingerprints: dict[int, np.ndarray] = {}
+
+    @property
+    def is_built(self) -> bool:
+        """Whether build() has run; until then add/remove are no-ops."""
+        return self._built
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def build(self, db: Session) -> None:
+        """
+        Fingerprint every document in the database.
+
+        Args:
+            db: Database session
+        """
+        with self._lock:
+            documents = db.query(Document).all()
+            fingerprints = {
+                doc.id: fingerprint(cleaned)
+                for doc, cleaned in zip(documents, get_cleaned_texts(db, documents))
+            }
+
+            self._postings = {}
+            self._fingerprints = {}
+            for document_id, hashes in fingerprints.items():
+                self._insert(document_id, hashes)
+            self._built = True
+
+        logger.info(f"[WINNOWING] Fingerprinted {len(fingerprints)} documents")
+
+    def sync(self, db: Session) -> None:
+        """
+        Bring a built index up to date with the documents table.
+
+        Documents missing from the index are fingerprinted and indexed
+        documents no longer in the database are removed.
+
+        Args:
+            db: Database session
+        """
+        with self._lock:
+            if not self._built:
+                return
+            stored_ids = {document_id for (document_id,) in db.query(Document.id)}
+            removed = self._fingerprints.keys() - stored_ids
+            for document_id in removed:
+                self._delete(document_id)
+
+            missing = stored_ids - self._fingerprints.keys()
+            if missing:
+                documents = db.query(Document).filter(Document.id.in_(missing)).all()
+                for doc, cleaned in zip(documents, get_cleaned_texts(db, documents)):
+                    self._insert(doc.id, fingerprint(cleaned))
+
+        logger.info(f"[WINNOWING] Synced with database: +{len(missing)} / -{len(removed)}")
+
+    def add(self, document: Document, cleaned_text: str | None = None) -> None:
+        """Fingerprint and insert (or replace) a document."""
+        if not self._built:
+            return
+        if cleaned_text is None:
+            cleaned_text = clean_text(document.content)
+        hashes = fingerprint(cleaned_text)
+        with self._lock:
+            self._delete(document.id)
+            self._insert(document.id, hashes)
+
+    def remove(self, document_id: int) -> None:
+        """Remove a document from the index."""
+        with self._lock:
+            self._delete(document_id)
+
+    def query(self, cleaned_text: str) -> list[PassageMatch]:
+        """
+        Find reference documents sharing passages with the query text.
+
+        Args:
+            cleaned_text: Output of clean_text()
+
+        Returns:
+            Matches sorted by number of shared fingerprints (highest first)
+        """
+        hashes = fingerprint(cleaned_text)
+        if len(hashes) == 0:
+            return []
+
+        shared: dict[int, int] = {}
+        with self._lock:
+            for value in hashes.tolist():
+                for document_id in self._postings.get(value, ()):
+                    shared[document_id] = shared.get(document_id, 0) + 1
+
+        matches = [
+            PassageMatch(
+                document_id=document_id,
+                shared_fingerprints=count,
+                coverage=count / len(hashes),
+            )
+            for document_id, count in shared.items()
+        ]
+        matches.sort(key=lambda m: m.shared_fingerprints, reverse=True)
+        return matches
+
+    def _insert(self, document_id: int, hashes: np.ndarray) -> None:
+        self._fingerprints[document_id] = hashes
+        for value in hashes.tolist():
+            self._postings.setdefault(value, set()).add(document_id)
+
+    def _delete(self, document_id: int) -> None:
+        hashes = self._fingerprints.pop(document_id, None)
+        if hashes is None:
+            return
+        for value in hashes.tolist():
+            documents = self._postings.get(value)
+            if documents is not None:
+                documents.discard(document_id)
+                if not documents:
+                    del self._postings[value]
+
+
+# Process-wide index shared by all requests
+winnowing_index = WinnowingIndex()
+
+
+def get_winnowing_index(db: Session) -> WinnowingIndex:
+    """
+    Return the shared winnowing index, building it on first use.
+
+    Args:
+        db: Database session used if the index still needs building
+
+    Returns:
+        The built WinnowingIndex
+    """
+    if not winnowing_index.is_built:
+        winnowing_index.build(db)
+    return winnowing_index
@@ -0,0 +1,83 @@
+"""
+Shared fixtures: a small synthetic corpus in an in-memory SQLite database.
+"""
+
+import random
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Document
+
+CATEGORIES = ("Science", "History", "Sports")
+
+# Word pool the documents are drawn from; a shared core plus a private
+# slice per category keeps scores spread between 0 and 1
+CORE_WORDS = [f"common{i}" for i in range(40)]
+CATEGORY_WORDS = {c: [f"{c.lower()}term{i}" for i in range(60)] for c in CATEGORIES}
+
+
+def make_text(rng: random.Random, category: str, length: int = 60) -> str:
+    """Random already-cleaned text in the style of a document of category."""
+    pool = CORE_WORDS + CATEGORY_WORDS[category]
+    return " ".join(rng.choice(pool) for _ in range(length))
+
+
+def make_documents(count: int, seed: int, first_id: int = 1) -> list[Document]:
+    """Documents with ids, content and categories, not attached to a session."""
+    rng = random.Random(seed)
+    documents = []
+    for offset in range(count):
+        category = CATEGORIES[offset % len(CATEGORIES)]
+        documents.append(
+            Document(
+                id=first_id + offset,
+                title=f"Document {first_id + offset}",
+                content=make_text(rng, category),
+                category=category,
+                source="tests",
+            )
+        )
+    return documents
+
+
+def brute_force_scores(index, text: str) -> np.ndarray:
+    """Dense cosine of text against every row of the index, 0 for dead rows."""
+    state = index.state
+    query = index.transform(text, state)
+    if query is None:
+        return np.zeros(len(state.documents))
+    matrix = state.stacked().toarray().astype(np.float64)
+    scores = matrix @ query.toarray().ravel()
+    scores[~state.alive] = 0.0
+    return scores
+
+
+@pytest.fixture
+def db():
+    """Session on a fresh in-memory database."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def corpus(db) -> list[Document]:
+    """Thirty stored documents, ten per category."""
+    documents = make_documents(30, seed=7)
+    db.add_all(documents)
+    db.commit()
+    return documents
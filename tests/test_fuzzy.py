@@ -0,0 +1,121 @@
+"""
+Memoized OCR corrections must match an uncached run, never outlive a
+vocabulary change, and survive vocabulary updates racing with them.
+"""
+
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from app.services.fuzzy import (
+    ENGINE_BKTREE,
+    ENGINE_EXTRACT,
+    ENGINE_OCR,
+    ENGINE_SYMSPELL,
+    Vocabulary,
+    correct_text,
+)
+
+ENGINES = [ENGINE_EXTRACT, ENGINE_SYMSPELL, ENGINE_BKTREE, ENGINE_OCR]
+
+
+def garble(text: str, seed: int) -> str:
+    """text with one character dropped from every other word."""
+    rng = random.Random(seed)
+    words = text.split()
+    for i in range(0, len(words), 2):
+        word = words[i]
+        cut = rng.randrange(len(word))
+        words[i] = word[:cut] + word[cut + 1:]
+    return " ".join(words)
+
+
+def fresh_vocabulary(db) -> Vocabulary:
+    vocabulary = Vocabulary()
+    vocabulary.build(db)
+    return vocabulary
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_memo_matches_uncached_correction(db, corpus, engine):
+    vocabulary = fresh_vocabulary(db)
+    texts = [garble(doc.content, seed=doc.id) for doc in corpus[:5]]
+
+    first = [correct_text(text, db, vocabulary, engine) for text in texts]
+    hits = vocabulary.corrections.hits
+    second = [correct_text(text, db, vocabulary, engine) for text in texts]
+    assert vocabulary.corrections.hits > hits
+    assert second == first
+
+    uncached = fresh_vocabulary(db)
+    assert [correct_text(text, db, uncached, engine) for text in texts] == first
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_memo_is_invalidated_by_vocabulary_changes(db, corpus, engine):
+    vocabulary = fresh_vocabulary(db)
+    word = "scienceterm7x"
+
+    assert correct_text(word, db, vocabulary, engine) != word
+    vocabulary.add(1000, Counter({word: 1}))
+    assert correct_text(word, db, vocabulary, engine) == word
+    vocabulary.remove(1000, Counter({word: 1}))
+    assert correct_text(word, db, vocabulary, engine) != word
+
+
+def test_vocabulary_updates_during_correction(db, corpus):
+    vocabulary = fresh_vocabulary(db)
+    # Build the engine indexes up front so updates mutate them mid-query;
+    # the other engines only read the immutable word set
+    vocabulary.symspell
+    vocabulary.bktree
+    # Switch threads often so lookups and updates interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+
+    texts = [garble(doc.content, seed=doc.id) for doc in corpus[:6]]
+    extra = [
+        Counter({f"{doc.category.lower()}term{i}x{n}": 1 for i in range(30)})
+        for n, doc in enumerate(corpus)
+    ]
+    errors: list[BaseException] = []
+    stop = threading.Event()
+
+    def correct(engine: str) -> None:
+        try:
+            while not stop.is_set():
+                for text in texts:
+                    correct_text(text, db, vocabulary, engine)
+        except BaseException as e:  # noqa: BLE001 - reported by the main thread
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=correct, args=(engine,))
+        for engine in (ENGINE_SYMSPELL, ENGINE_BKTREE)
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        deadline = time.monotonic() + 3.0
+        while time.monotonic() < deadline:
+            for n, counts in enumerate(extra):
+                vocabulary.add(2000 + n, counts)
+            for n, counts in enumerate(extra):
+                vocabulary.remove(2000 + n, counts)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        sys.setswitchinterval(interval)
+
+    assert not errors, errors
+    # Back to the stored corpus: results must equal a freshly built vocabulary
+    reference = fresh_vocabulary(db)
+    for engine in ENGINES:
+        expected = [correct_text(text, db, reference, engine) for text in texts]
+        assert [correct_text(text, db, vocabulary, engine) for text in texts] == expected
@@ -0,0 +1,185 @@
+"""
+Every fast scoring path of the corpus index must agree with a brute-force
+dense cosine product, before and after incremental appends and deletes.
+"""
+
+import os
+import random
+
+import numpy as np
+import pytest
+
+from app.services.index import SNAPSHOT_POINTER, CorpusIndex
+from tests.conftest import CATEGORIES, brute_force_scores, make_documents, make_text
+
+APPENDED_IDS = list(range(100, 108))
+DELETED_IDS = [3, 10, 17, 102]
+
+
+def build_index(changed: bool) -> CorpusIndex:
+    """Index over the synthetic corpus, optionally with appended and deleted rows."""
+    documents = make_documents(30, seed=7)
+    index = CorpusIndex()
+    index.fit(documents, [doc.content for doc in documents])
+    if changed:
+        appended = make_documents(len(APPENDED_IDS), seed=11, first_id=APPENDED_IDS[0])
+        for doc in appended:
+            # Terms unknown to the fit are dropped from appended rows
+            doc.content += " unseenword anotherunseenword"
+        index.add_documents(appended, [doc.content for doc in appended])
+        index.remove_documents(DELETED_IDS)
+    return index
+
+
+def queries() -> list[str]:
+    """Random texts plus verbatim copies of fitted, appended and deleted documents."""
+    rng = random.Random(3)
+    texts = [make_text(rng, c, length=40) for c in CATEGORIES for _ in range(3)]
+    texts.append(make_text(rng, "Science", length=5) + " unseenword")
+    fitted = make_documents(30, seed=7)
+    appended = make_documents(len(APPENDED_IDS), seed=11, first_id=APPENDED_IDS[0])
+    texts += [fitted[0].content, fitted[2].content, appended[2].content, appended[5].content]
+    return texts
+
+
+@pytest.fixture(params=[False, True], ids=["fitted", "appended+deleted"])
+def index(request) -> CorpusIndex:
+    return build_index(request.param)
+
+
+def assert_top(rows: np.ndarray, scores: np.ndarray, expected: np.ndarray, top_n: int | None) -> None:
+    """rows/scores must be the top_n positive entries of expected, highest first."""
+    np.testing.assert_allclose(scores, expected[rows], atol=1e-5)
+    positive = np.sort(expected[expected > 1e-9])[::-1]
+    if top_n is not None:
+        positive = positive[:top_n]
+    np.testing.assert_allclose(scores, positive, atol=1e-5)
+
+
+def test_deleted_rows_are_never_returned():
+    index = build_index(changed=True)
+    assert all(index.get(i) is None for i in DELETED_IDS)
+    dead = set(np.flatnonzero(~index.state.alive).tolist())
+    assert len(dead) == len(DELETED_IDS)
+    for text in queries():
+        returned = set(index.score_candidates(text)[0].tolist())
+        returned |= set(index.score_sharded(text, None, shards=4)[0].tolist())
+        returned |= set(index.score_approximate(text, None)[0].tolist())
+        assert not dead & returned
+
+
+def test_score_candidates_matches_brute_force(index):
+    for text in queries():
+        expected = brute_force_scores(index, text)
+        rows, scores, _ = index.score_candidates(text)
+        assert set(rows.tolist()) == set(np.flatnonzero(expected > 1e-9).tolist())
+        np.testing.assert_allclose(scores, expected[rows], atol=1e-5)
+
+
+@pytest.mark.parametrize("shards", [1, 4])
+@pytest.mark.parametrize("top_n", [1, 5, None])
+def test_score_sharded_matches_brute_force(index, shards, top_n):
+    for text in queries():
+        expected = brute_force_scores(index, text)
+        rows, scores, _ = index.score_sharded(text, top_n, shards=shards)
+        assert_top(rows, scores, expected, top_n)
+
+
+def test_score_batch_matches_brute_force(index):
+    texts = queries()
+    results, _ = index.score_batch(texts, 5)
+    for text, (rows, scores) in zip(texts, results):
+        assert_top(rows, scores, brute_force_scores(index, text), 5)
+
+
+def test_score_categories_matches_brute_force(index):
+    state = index.state
+    for categories in (["Science"], ["History", "Sports"]):
+        in_scope = np.array([doc.category in categories for doc in state.documents])
+        for text in queries():
+            expected = np.where(in_scope, brute_force_scores(index, text), 0.0)
+            rows, scores, _ = index.score_categories(text, categories, 5)
+            assert_top(rows, scores, expected, 5)
+
+
+def test_score_approximate_rescores_exactly(index):
+    for text in queries():
+        expected = brute_force_scores(index, text)
+        # A shortlist covering the corpus is exact
+        rows, scores, _ = index.score_approximate(text, 5, candidates=len(expected))
+        assert_top(rows, scores, expected, 5)
+        # A short one may miss documents but never misreports a score
+        rows, scores, _ = index.score_approximate(text, 5, candidates=4)
+        np.testing.assert_allclose(scores, expected[rows], atol=1e-5)
+
+
+@pytest.mark.parametrize("threshold", [0.1, 0.3, 0.5, 0.9])
+@pytest.mark.parametrize("block_size", [1, 64])
+def test_first_above_matches_brute_force(index, threshold, block_size):
+    for text in queries():
+        expected = brute_force_scores(index, text)
+        found = index.first_above(text, threshold, block_size=block_size)
+        if expected.max() < threshold - 1e-5:
+            assert found is None
+        elif expected.max() >= threshold + 1e-5:
+            assert found is not None
+            row, score, _ = found
+            assert score >= threshold
+            assert score == pytest.approx(expected[row], abs=1e-5)
+
+
+def test_first_above_respects_categories(index):
+    state = index.state
+    in_scope = np.array([doc.category == "History" for doc in state.documents])
+    for text in queries():
+        expected = np.where(in_scope, brute_force_scores(index, text), 0.0)
+        found = index.first_above(text, 0.2, categories=["History"])
+        if expected.max() >= 0.2 + 1e-5:
+            assert found is not None and in_scope[found[0]]
+        elif expected.max() < 0.2 - 1e-5:
+            assert found is None
+
+
+def test_score_documents_skips_unindexed_ids(index):
+    state = index.state
+    ids = [1, 3, 100, 102, 999]
+    for text in queries():
+        expected = brute_force_scores(index, text)
+        rows, scores, _ = index.score_documents(text, ids)
+        assert [state.documents[r].document_id for r in rows] == [i for i in ids if i in state.rows]
+        np.testing.assert_allclose(scores, expected[rows], atol=1e-5)
+
+
+def test_snapshot_round_trip(tmp_path):
+    original = build_index(changed=True)
+    assert original.save(str(tmp_path))
+    first = (tmp_path / SNAPSHOT_POINTER).read_text()
+
+    loaded = CorpusIndex()
+    assert loaded.load(str(tmp_path))
+    assert len(loaded) == len(original)
+    for text in queries():
+        np.testing.assert_allclose(
+            brute_force_scores(loaded, text), brute_force_scores(original, text), atol=1e-6
+        )
+        rows, scores, _ = loaded.score_candidates(text)
+        expected = brute_force_scores(original, text)
+        np.testing.assert_allclose(scores, expected[rows], atol=1e-5)
+
+    # Changes on top of the memory-mapped arrays, then a new published snapshot
+    extra = make_documents(2, seed=21, first_id=200)
+    loaded.add_documents(extra, [doc.content for doc in extra])
+    loaded.remove_documents([1])
+    for text in queries():
+        rows, scores, _ = loaded.score_candidates(text)
+        np.testing.assert_allclose(scores, brute_force_scores(loaded, text)[rows], atol=1e-5)
+
+    assert loaded.save(str(tmp_path))
+    second = (tmp_path / SNAPSHOT_POINTER).read_text()
+    assert second != first
+    assert os.path.isdir(tmp_path / second)
+
+    reloaded = CorpusIndex()
+    assert reloaded.load(str(tmp_path))
+    assert reloaded.get(200) is not None and reloaded.get(1) is None
+    assert len(reloaded) == len(loaded)
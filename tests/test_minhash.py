@@ -0,0 +1,85 @@
+"""
+MinHash LSH must shortlist near-duplicates, and the shortlist must be
+re-scored with the same cosine the TF-IDF engine reports.
+"""
+
+import random
+
+from app.models import Document
+from app.services import similarity
+from app.services.index import CorpusIndex
+from app.services.minhash import MinHashIndex, compute_signature, shingles
+from tests.conftest import brute_force_scores
+
+
+def jaccard(a: str, b: str) -> float:
+    """Exact Jaccard similarity of the shingle sets of two texts."""
+    x, y = shingles(a), shingles(b)
+    return len(x & y) / len(x | y)
+
+
+def near_copy(text: str, changes: int, seed: int) -> str:
+    """text with a few words replaced."""
+    rng = random.Random(seed)
+    words = text.split()
+    for i in rng.sample(range(len(words)), changes):
+        words[i] = f"typo{i}"
+    return " ".join(words)
+
+
+def test_lsh_returns_every_near_duplicate(db, corpus):
+    index = MinHashIndex()
+    index.build(db)
+    assert len(index) == len(corpus)
+
+    for doc in corpus:
+        for changes in (0, 1, 2):
+            text = near_copy(doc.content, changes, seed=doc.id)
+            matches = index.query(compute_signature(text))
+            found = {m.document_id: m.jaccard for m in matches}
+            # At Jaccard >= 0.8 a miss across 32 bands of 4 is ~1e-7 likely
+            for other in corpus:
+                if jaccard(text, other.content) >= 0.8:
+                    assert other.id in found
+            assert matches[0].document_id == doc.id
+            assert abs(found[doc.id] - jaccard(text, doc.content)) < 0.2
+
+
+def test_lsh_add_remove_and_sync(db, corpus):
+    index = MinHashIndex()
+    index.build(db)
+    victim = corpus[4]
+    signature = compute_signature(victim.content)
+
+    index.remove(victim.id)
+    assert victim.id not in {m.document_id for m in index.query(signature)}
+    index.add(victim.id, signature)
+    assert index.query(signature)[0].document_id == victim.id
+
+    db.delete(db.get(Document, victim.id))
+    db.commit()
+    index.sync(db)
+    assert victim.id not in {m.document_id for m in index.query(signature)}
+    assert len(index) == len(corpus) - 1
+
+
+def test_minhash_engine_reports_exact_cosine(db, corpus, monkeypatch):
+    lsh = MinHashIndex()
+    lsh.build(db)
+    monkeypatch.setattr(similarity, "get_minhash_index", lambda _db: lsh)
+
+    index = CorpusIndex()
+    index.fit(corpus, [doc.content for doc in corpus])
+    index.remove_documents([corpus[1].id])
+
+    for doc in corpus[:6]:
+        text = near_copy(doc.content, 2, seed=doc.id)
+        expected = brute_force_scores(index, text)
+        matches = similarity._find_minhash_matches(text, db, index, None, None)
+        if index.get(doc.id) is None:
+            assert doc.id not in {m.document_id for m in matches}
+            continue
+        assert matches[0].document_id == doc.id
+        for match in matches:
+            row = index.state.rows[match.document_id]
+            assert abs(match.similarity_score - expected[row]) < 1e-5